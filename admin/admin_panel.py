@@ -1,5 +1,14 @@
-import pandas as pd
 import os
+import sys
+
+import pandas as pd
+import streamlit as st
+
+# Make the shared utils package importable when this script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ingest import IngestError, ingest_csv
+from utils.registry import registry, upload_path
 
 def admin_panel():
     st.title("Admin Panel - Upload Dataset")
@@ -12,14 +21,28 @@ def admin_panel():
     uploaded_file = st.file_uploader("Upload a CSV file", type=["csv"])
 
     if uploaded_file:
-        data = pd.read_csv(uploaded_file)
-        st.write("Preview of uploaded data:", data.head())
+        # Only the first rows are parsed for the preview, the full file is streamed on save
+        preview = pd.read_csv(uploaded_file, nrows=5)
+        uploaded_file.seek(0)
+        st.write("Preview of uploaded data:", preview)
 
         if st.button("Save Dataset"):
-            data_path = f"datasets/{dataset_name}.csv"
-            os.makedirs("datasets", exist_ok=True)
-            data.to_csv(data_path, index=False)
-            st.success(f"Dataset '{dataset_name}' saved successfully!")
+            progress_bar = st.progress(0.0, text="Validating and saving dataset...")
+            try:
+                data_path = upload_path(dataset_name)
+                rows = ingest_csv(uploaded_file, data_path, progress=progress_bar.progress)
+            except IngestError as error:
+                st.error(f"Dataset not saved: {error}")
+            else:
+                # Register the new version; pages pick it up on their next run.
+                # Uploads named like a statistics dataset (e.g. "Titanium Export") replace it.
+                entry = next((entry for entry in registry().entries() if entry['path'] == data_path), None)
+                if entry is None:
+                    st.error(f"Dataset saved to {data_path} but could not be registered.")
+                    return
+                if dataset_description:
+                    registry().set_description(entry['name'], dataset_description)
+                st.success(f"Dataset '{entry['name']}' saved successfully! ({rows:,} rows, version {entry['version']})")
 
-if st.session_state['logged_in']:
+if st.session_state.get('logged_in'):
     admin_panel()
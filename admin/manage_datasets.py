@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pandas as pd
+import streamlit as st
+
+# Make the shared utils package importable when this script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.registry import registry
+
+def manage_datasets():
+    st.title("Admin Panel - Manage Datasets")
+
+    # Every dataset the pages read, as recorded in the manifest
+    entries = registry().entries()
+    overview = pd.DataFrame([{
+        'Name': entry['name'],
+        'Kind': entry['kind'],
+        'Source': entry['origin'],
+        'Version': entry['version'],
+        'Content hash': entry['content_hash'],
+        'Updated': entry['updated_at'],
+        'Columns': len(entry['schema']),
+        'Cached artifacts': len(entry['artifacts']),
+    } for entry in entries])
+    st.dataframe(overview, hide_index=True, use_container_width=True)
+
+    # Details of a single dataset
+    names = [entry['name'] for entry in entries]
+    selected_name = st.selectbox("Select a dataset", names)
+    if selected_name is None:
+        return
+    entry = next(entry for entry in entries if entry['name'] == selected_name)
+
+    st.write(f"**File:** `{entry['path']}`")
+    if entry['description']:
+        st.write(f"**Description:** {entry['description']}")
+    st.write("**Schema:**")
+    st.dataframe(pd.DataFrame(list(entry['schema'].items()), columns=['Column', 'Type']), hide_index=True)
+    if entry['artifacts']:
+        st.write("**Cached artifacts:**")
+        st.write("\n".join(f"- `{path}`" for path in entry['artifacts']))
+
+    # Uploaded datasets can be removed; a built-in dataset of the same name then takes their place
+    if entry['origin'] == 'upload' and st.button("Delete Dataset"):
+        registry().remove_upload(selected_name)
+        st.success(f"Dataset '{selected_name}' deleted.")
+        st.rerun()
+
+if st.session_state.get('logged_in'):
+    manage_datasets()
@@ -0,0 +1,177 @@
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.synthetic import build_workspace
+
+# Element types counted as figure payload (Plotly charts, folium maps, images)
+FIGURE_ELEMENTS = {'plotly_chart', 'component_instance', 'imgs'}
+
+
+@contextlib.contextmanager
+def _working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+# Size in bytes of the element protos produced by the last run, i.e. roughly
+# what is sent to the browser
+def _payload_sizes(at):
+    total, figures = 0, 0
+    stack = [at._tree]
+    while stack:
+        node = stack.pop()
+        proto = getattr(node, 'proto', None)
+        if proto is not None and hasattr(proto, 'ByteSize'):
+            size = proto.ByteSize()
+            total += size
+            if node.type in FIGURE_ELEMENTS:
+                figures += size
+        stack.extend(getattr(node, 'children', {}).values())
+    return total, figures
+
+
+# Run one scenario and return a record per step.
+# With measure_memory the scenario is run a second time under tracemalloc,
+# so the tracing overhead does not distort the wall times.
+def run_scenario(name, scale, measure_memory=True, timeout=600):
+    from streamlit.testing.v1 import AppTest
+
+    script, steps = SCENARIOS[name]
+    script_path = os.path.join(REPO_DIR, script)
+    records = []
+
+    at = AppTest.from_file(script_path, default_timeout=timeout)
+    for step, action in steps:
+        action(at)
+        start = time.perf_counter()
+        at.run()
+        wall_ms = (time.perf_counter() - start) * 1000
+        total, figures = _payload_sizes(at)
+        records.append({
+            'page': name, 'scale': scale, 'step': step, 'wall_ms': round(wall_ms, 2),
+            'payload_bytes': total, 'figure_payload_bytes': figures,
+            'exception': [e.value for e in at.exception] or None,
+        })
+
+    if measure_memory:
+        at = AppTest.from_file(script_path, default_timeout=timeout)
+        for record, (step, action) in zip(records, steps):
+            action(at)
+            tracemalloc.start()
+            at.run()
+            record['peak_memory_kb'] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            tracemalloc.stop()
+    return records
+
+
+def run(args):
+    pages = args.pages or list(SCENARIOS)
+    results = []
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory(prefix=f"reno-titan-bench-{scale}x-") as workspace:
+            build_workspace(REPO_DIR, workspace, scale, extra_years=args.extra_years)
+            with _working_directory(workspace):
+                for page in pages:
+                    records = run_scenario(page, scale, measure_memory=not args.no_memory)
+                    results.extend(records)
+                    for record in records:
+                        print(f"{scale:>5}x  {page:<20} {record['step']:<26} {record['wall_ms']:>10.1f} ms"
+                              f"  {record['payload_bytes'] / 1024:>9.1f} KB", file=sys.stderr)
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    output = {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'commit': commit or None,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scales': args.scales,
+            'extra_years': args.extra_years,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}", file=sys.stderr)
+    return 1 if any(record['exception'] for record in results) else 0
+
+
+# Compare two result files step by step and report steps that got slower,
+# larger or heavier than the threshold. Returns a non-zero exit code on regressions.
+def compare(args):
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = {(r['page'], r['scale'], r['step']): r for r in json.load(f)['results']}
+    with open(args.candidate, encoding='utf-8') as f:
+        candidate = json.load(f)['results']
+
+    regressions = 0
+    for record in candidate:
+        old = baseline.get((record['page'], record['scale'], record['step']))
+        if old is None:
+            continue
+        for metric in ('wall_ms', 'peak_memory_kb', 'payload_bytes'):
+            if metric not in record or metric not in old or not old[metric]:
+                continue
+            change = record[metric] / old[metric] - 1
+            flag = ''
+            if change > args.threshold:
+                flag = '  REGRESSION'
+                regressions += 1
+            if flag or args.verbose:
+                print(f"{record['scale']:>5}x  {record['page']:<20} {record['step']:<26} {metric:<15}"
+                      f" {old[metric]:>12.1f} -> {record[metric]:>12.1f} ({change:+.0%}){flag}")
+    print(f"{regressions} regression(s) above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless benchmarks for the RENO-TITAN dashboard pages.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run the page scenarios and write JSON results")
+    run_parser.add_argument('--scales', type=int, nargs='+', default=[1, 10],
+                            help="Data scale factors (1 = the bundled datasets)")
+    run_parser.add_argument('--extra-years', type=int, default=0,
+                            help="Additional synthetic year columns for the statistics datasets")
+    run_parser.add_argument('--pages', nargs='+', choices=list(SCENARIOS), help="Pages to run (default: all)")
+    run_parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc pass")
+    run_parser.add_argument('--output', default='bench_results.json')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser('compare', help="Compare two result files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=0.2,
+                                help="Relative increase reported as a regression (default 0.2)")
+    compare_parser.add_argument('--verbose', action='store_true', help="Print every metric, not only regressions")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    # folium warns about CartoDB tile keys on every map, which would drown the progress output
+    warnings.filterwarnings('ignore', category=UserWarning, module='folium')
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
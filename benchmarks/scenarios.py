@@ -0,0 +1,63 @@
+# Scripted interactions for every page. Each scenario is a list of
+# (step name, action) pairs; an action changes widgets on the AppTest before
+# the page is re-run. The first step of every scenario is the cold first run.
+
+
+def _widget(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f"No widget labelled {label!r}")
+
+
+def _first_options(elements, label, n):
+    widget = _widget(elements, label)
+    return widget.set_value(list(widget.options[:n]))
+
+
+LANDING_PAGE = [
+    ('first run', lambda at: None),
+    ('rerun', lambda at: None),
+]
+
+MINERAL_STATISTICS = [
+    ('first run', lambda at: None),
+    ('select zirconium', lambda at: _widget(at.radio, 'Select Mineral').set_value('Zirconium')),
+    ('select production', lambda at: _widget(at.radio, 'Statistic Type').set_value('Production')),
+    ('select titanium import', lambda at: (_widget(at.radio, 'Select Mineral').set_value('Titanium'),
+                                           _widget(at.radio, 'Statistic Type').set_value('Import'))),
+    ('select countries', lambda at: _first_options(at.multiselect, 'Select Countries', 5)),
+    ('single year map', lambda at: _widget(at.radio, 'Map mode').set_value('Single year')),
+    ('move year slider', lambda at: _widget(at.slider, 'Select Year').set_value(2018)),
+    ('show raw data', lambda at: _widget(at.checkbox, 'Show Raw Data').check()),
+]
+
+MINING_DEPOSITS = [
+    ('first run', lambda at: None),
+    ('select country', lambda at: _widget(at.selectbox, 'Select Country').set_value('China')),
+    ('select critical minerals', lambda at: _first_options(at.multiselect, 'Select Critical Minerals', 2)),
+    ('reset filters', lambda at: (_widget(at.selectbox, 'Select Country').set_value('All'),
+                                  _widget(at.multiselect, 'Select Critical Minerals').set_value([]))),
+]
+
+MINING_AREAS = [
+    ('first run', lambda at: None),
+    ('select ten countries', lambda at: _first_options(at.multiselect, 'Select Countries', 10)),
+    ('show raw data', lambda at: _widget(at.checkbox, 'Show Raw Data').check()),
+]
+
+VIETNAM_STATISTICS = [('first run', lambda at: None)] + [
+    (f"plot {plot_type.lower()}", lambda at, plot_type=plot_type: _widget(at.selectbox, 'Choose the type of plot').set_value(plot_type))
+    for plot_type in ["Bar Charts", "Stacked Area Charts", "Heatmaps", "Box Plots", "Facet Grids", "Line Charts"]
+] + [
+    ('select three minerals', lambda at: _first_options(at.multiselect, 'Select Minerals', 3)),
+]
+
+# Page script (relative to the repository root) -> scenario
+SCENARIOS = {
+    'landing': ('reno-titan-app.py', LANDING_PAGE),
+    'mineral_statistics': ('pages/2_📶_Mineral_Statistics.py', MINERAL_STATISTICS),
+    'mining_deposits': ('pages/3_🪨_Global_Mining_Deposits.py', MINING_DEPOSITS),
+    'mining_areas': ('pages/4_🌍_Global _Mining_Areas.py', MINING_AREAS),
+    'vietnam_statistics': ("pages/5_🇻🇳_Vietnam's_Mineral_Production_Statistics.py", VIETNAM_STATISTICS),
+}
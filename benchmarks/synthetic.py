@@ -0,0 +1,112 @@
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+YEAR_PATTERN = re.compile(r'^\d{4}$')
+
+# Files and folders the pages read besides data/
+STATIC_DIRS = ['images', 'assets']
+
+
+def _year_columns(df):
+    return [column for column in df.columns if YEAR_PATTERN.match(column.strip())]
+
+
+# Append extra_years new year columns after the last one, with values drawn
+# from the existing years times some noise
+def _extend_years(df, extra_years, rng):
+    years = _year_columns(df)
+    if not extra_years or not years:
+        return df
+    last = int(years[-1].strip())
+    base = df[years].to_numpy(dtype=float)
+    new_columns = {}
+    for offset in range(1, extra_years + 1):
+        source = base[np.arange(len(df)), rng.integers(0, len(years), len(df))]
+        new_columns[str(last + offset)] = np.round(source * rng.lognormal(0, 0.2, len(df)))
+    return pd.concat([df, pd.DataFrame(new_columns, index=df.index)], axis=1)
+
+
+# Statistics CSV (Country, [Sub-commodity], years...): one copy of every country per scale step
+def scale_statistics(df, scale, extra_years=0, rng=None):
+    rng = rng or np.random.default_rng(0)
+    country = df.columns[0]
+    years = _year_columns(df)
+    copies = []
+    for k in range(scale):
+        copy = df.copy()
+        if k:
+            copy[country] = copy[country].astype(str) + f" {k}"
+            copy[years] = np.round(copy[years] * rng.lognormal(0, 0.3, (len(copy), len(years))))
+        copies.append(copy)
+    return _extend_years(pd.concat(copies, ignore_index=True), extra_years, rng)
+
+
+# Deposits CSV: scale copies of every deposit, jittered by up to half a degree
+def scale_deposits(df, scale, rng=None):
+    rng = rng or np.random.default_rng(0)
+    copies = [df]
+    for k in range(1, scale):
+        copy = df.copy()
+        copy['LATITUDE'] = np.clip(copy['LATITUDE'] + rng.uniform(-0.5, 0.5, len(copy)), -90, 90)
+        copy['LONGITUDE'] = (copy['LONGITUDE'] + rng.uniform(-0.5, 0.5, len(copy)) + 180) % 360 - 180
+        copy['DEPOSIT_NA'] = copy['DEPOSIT_NA'].astype(str) + f" #{k}"
+        copy['wkt_geom'] = 'Point (' + copy['LONGITUDE'].astype(str) + ' ' + copy['LATITUDE'].astype(str) + ')'
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+# Mining area per country: scale copies of every country
+def scale_mining_areas(df, scale, rng=None):
+    rng = rng or np.random.default_rng(0)
+    copies = [df]
+    for k in range(1, scale):
+        copy = df.copy()
+        copy['COUNTRY_NAME'] = copy['COUNTRY_NAME'] + f" {k}"
+        copy['AREA'] = copy['AREA'] * rng.lognormal(0, 0.3, len(copy))
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+# Vietnam yearbook (one row per year): scale times as many years, continuing after the last one
+def scale_yearbook(df, scale, rng=None):
+    rng = rng or np.random.default_rng(0)
+    copies = [df]
+    first, span = int(df['Year'].min()), len(df)
+    for k in range(1, scale):
+        copy = df.copy()
+        copy['Year'] = copy['Year'] - first + int(df['Year'].max()) + 1 + (k - 1) * span
+        values = copy.columns.drop('Year')
+        copy[values] = copy[values] * rng.lognormal(0, 0.2, (len(copy), len(values)))
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+# Build a workspace with the same layout as the repository (data/, images/, assets/)
+# where every dataset is scaled by scale. Pages read relative paths, so they can
+# be run against it by changing into the workspace directory.
+def build_workspace(source_dir, dest_dir, scale, extra_years=0, seed=0):
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.join(dest_dir, 'data'), exist_ok=True)
+    for name in STATIC_DIRS:
+        if os.path.isdir(os.path.join(source_dir, name)):
+            shutil.copytree(os.path.join(source_dir, name), os.path.join(dest_dir, name), dirs_exist_ok=True)
+
+    data_dir = os.path.join(source_dir, 'data')
+    for name in sorted(os.listdir(data_dir)):
+        if not name.endswith('.csv'):
+            continue
+        df = pd.read_csv(os.path.join(data_dir, name))
+        if name == 'Global Mineral Mining Stations.csv':
+            df = scale_deposits(df, scale, rng)
+        elif name == 'global_mining_area_per_country_v2.csv':
+            df = scale_mining_areas(df, scale, rng)
+        elif name == 'Vietnam Statistical Yearbook Data.csv':
+            df = scale_yearbook(df, scale, rng)
+        else:
+            df = scale_statistics(df, scale, extra_years, rng)
+        df.to_csv(os.path.join(dest_dir, 'data', name), index=False)
+    return dest_dir
@@ -1,115 +1,336 @@
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
 
-# File paths for all statistics
-titanium_export_path = 'data/Titanium Export Statistics.csv'
-titanium_import_path = 'data/Titanium Import Statistics.csv'
-titanium_production_path = 'data/Titanium Production Statistics.csv'
+# All nine datasets live in one shared, categorical store (see utils/commodity_store.py)
+from utils.aggregates import get_cube
+from utils.commodity_store import get_store
+from utils.countries import iso3_version, to_iso3
+from utils.data_grid import data_grid
+from utils.data_loader import FLOWS, MINERALS, file_version
+from utils.figure_cache import cached_figure
+from utils.instrumentation import finish_run, profiled_fragment, span, start_run
+from utils.registry import statistics_datasets
+from utils.trade_analytics import MIN_REPORTERS, get_trade_cube, supply_risk_summary
 
-zirconium_export_path = 'data/Zirconium Export Statistics.csv'
-zirconium_import_path = 'data/Zirconium Import Statistics.csv'
-zirconium_production_path = 'data/Zirconium Production Statistics.csv'
-
-rare_earth_export_path = 'data/Rare_Earth_Export_Statistics.csv'
-rare_earth_import_path = 'data/Rare_Earth_Import_Statistics.csv'
-rare_earth_production_path = 'data/Rare_Earth_Production_Statistics.csv'
-
-# Function to load and preprocess the data
-def load_and_clean_data(data_path):
-    df = pd.read_csv(data_path)
-    df.columns = df.columns.str.strip()  # Clean column names by stripping whitespace
-    df_cleaned = df.dropna(subset=[str(year) for year in range(2012, 2022)], how='all')  # Clean rows with NaN values
-    df_melted = df_cleaned.melt(id_vars=['Country', 'Sub-commodity'], var_name='Year', value_name='Metric Ton')
-    return df_melted
+start_run("Mineral Statistics")
 
 # Sidebar for mineral selection and statistics type
 st.sidebar.title("Mineral Statistics")
-mineral_page = st.sidebar.radio("Select Mineral", ["Titanium", "Zirconium", "Rare Earth"])
+mineral_page = st.sidebar.radio("Select Mineral", MINERALS)
 
 st.sidebar.title("Select Statistic Type")
-stat_type = st.sidebar.radio("Statistic Type", ["Export", "Import", "Production"])
+stat_type = st.sidebar.radio("Statistic Type", FLOWS)
 
 # Load data based on mineral and statistic type
-if mineral_page == "Titanium":
-    st.title(f"Interactive Dashboard: Titanium {stat_type} Statistics")
-    if stat_type == "Export":
-        df_filtered = load_and_clean_data(titanium_export_path)
-    elif stat_type == "Import":
-        df_filtered = load_and_clean_data(titanium_import_path)
-    else:
-        df_filtered = load_and_clean_data(titanium_production_path)
-        
-elif mineral_page == "Zirconium":
-    st.title(f"Interactive Dashboard: Zirconium {stat_type} Statistics")
-    if stat_type == "Export":
-        df_filtered = load_and_clean_data(zirconium_export_path)
-    elif stat_type == "Import":
-        df_filtered = load_and_clean_data(zirconium_import_path)
-    else:
-        df_filtered = load_and_clean_data(zirconium_production_path)
-        
-else:
-    st.title(f"Interactive Dashboard: Rare Earth {stat_type} Statistics")
-    if stat_type == "Export":
-        df_filtered = load_and_clean_data(rare_earth_export_path)
-    elif stat_type == "Import":
-        df_filtered = load_and_clean_data(rare_earth_import_path)
-    else:
-        df_filtered = load_and_clean_data(rare_earth_production_path)
+st.title(f"Interactive Dashboard: {mineral_page} {stat_type} Statistics")
+with span('load'):
+    data_path = statistics_datasets()[(mineral_page, stat_type)]
+    data_version = file_version(data_path)
+    df_filtered = get_store().statistics_view(mineral_page, stat_type)
+    # Totals, maxima and per-year slices precomputed for this dataset
+    cube = get_cube(mineral_page, stat_type)
 
 # Filter data based on country and sub-commodity selections
 st.subheader(f"Filter Data for {mineral_page} {stat_type}")
 country_filter = st.multiselect('Select Countries', options=df_filtered['Country'].unique())
 commodity_filter = st.multiselect('Select Sub-commodities', options=df_filtered['Sub-commodity'].unique())
 
-# If no country is selected, display data for top 3 countries with the highest metric tons
-if not country_filter:
-    top_3_countries = df_filtered.groupby('Country')['Metric Ton'].sum().nlargest(3).index
-    df_filtered = df_filtered[df_filtered['Country'].isin(top_3_countries)]
+with span('filter'):
+    # If no country is selected, display data for top 3 countries with the highest metric tons
+    if not country_filter:
+        top_3_countries = cube.top_countries(3)
+        df_filtered = df_filtered[df_filtered['Country'].isin(top_3_countries)]
 
-if country_filter:
-    df_filtered = df_filtered[df_filtered['Country'].isin(country_filter)]
-if commodity_filter:
-    df_filtered = df_filtered[df_filtered['Sub-commodity'].isin(commodity_filter)]
+    if country_filter:
+        df_filtered = df_filtered[df_filtered['Country'].isin(country_filter)]
+    if commodity_filter:
+        df_filtered = df_filtered[df_filtered['Sub-commodity'].isin(commodity_filter)]
 
 # Display maximum value for the selected data
 st.subheader(f"Maximum {stat_type} for {mineral_page}")
-max_value = df_filtered['Metric Ton'].max()
-max_row = df_filtered[df_filtered['Metric Ton'] == max_value]
-st.metric(label=f"Maximum {stat_type} (Metric Ton)", value=f"{max_value:,}")
-st.write(f"Country: {max_row.iloc[0]['Country']}, Sub-commodity: {max_row.iloc[0]['Sub-commodity']}, Year: {max_row.iloc[0]['Year']}")
+selected_countries = country_filter if country_filter else top_3_countries
+with span('aggregate'):
+    max_entry = cube.max_entry(selected_countries, commodity_filter)
+if max_entry is None:
+    st.write("No data available for the selected filters.")
+else:
+    max_value, max_country, max_commodity, max_year = max_entry
+    st.metric(label=f"Maximum {stat_type} (Metric Ton)", value=f"{max_value:,}")
+    st.write(f"Country: {max_country}, Sub-commodity: {max_commodity}, Year: {max_year}")
 
 # Create charts for the selected mineral and statistic
+# Figures are cached per dataset version and filter selection (see utils/figure_cache.py)
+chart_selection = dict(mineral=mineral_page, flow=stat_type, countries=selected_countries, commodities=commodity_filter)
+
+def build_line_chart():
+    line_chart = px.line(df_filtered, x='Year', y='Metric Ton', color='Sub-commodity', line_group='Country', 
+                         facet_col='Country', markers=True, 
+                         title=f"Trend of {mineral_page} {stat_type} Over Time", 
+                         labels={'Metric Ton': 'Amount (Metric Ton)'})
+    line_chart.update_layout(hovermode='x unified', template='plotly_dark', title_font=dict(size=24), 
+                             font=dict(family="Arial", size=14), width=1800, height=600)
+    return line_chart
+
 st.subheader(f"Trend of {mineral_page} {stat_type} Over Time")
-line_chart = px.line(df_filtered, x='Year', y='Metric Ton', color='Sub-commodity', line_group='Country', 
-                     facet_col='Country', markers=True, 
-                     title=f"Trend of {mineral_page} {stat_type} Over Time", 
-                     labels={'Metric Ton': 'Amount (Metric Ton)'})
-line_chart.update_layout(hovermode='x unified', template='plotly_dark', title_font=dict(size=24), 
-                         font=dict(family="Arial", size=14), width=1800, height=600)
-st.plotly_chart(line_chart)
+line_chart = cached_figure('line', data_version, build_line_chart, **chart_selection)
+with span('render'):
+    st.plotly_chart(line_chart)
+
+def build_bar_chart():
+    bar_chart = px.bar(df_filtered, x='Country', y='Metric Ton', color='Sub-commodity', barmode='group', 
+                       title=f"Comparison of {mineral_page} {stat_type} by Country and Sub-commodity")
+    bar_chart.update_layout(hovermode='x unified', template='plotly_dark', title_font=dict(size=24),
+                            font=dict(family="Arial", size=14))
+    return bar_chart
 
 st.subheader(f"Comparison of {mineral_page} {stat_type} by Country and Sub-commodity")
-bar_chart = px.bar(df_filtered, x='Country', y='Metric Ton', color='Sub-commodity', barmode='group', 
-                   title=f"Comparison of {mineral_page} {stat_type} by Country and Sub-commodity")
-bar_chart.update_layout(hovermode='x unified', template='plotly_dark', title_font=dict(size=24),
-                        font=dict(family="Arial", size=14))
-st.plotly_chart(bar_chart)
+bar_chart = cached_figure('bar', data_version, build_bar_chart, **chart_selection)
+with span('render'):
+    st.plotly_chart(bar_chart)
 
 # Choropleth map for geographical distribution
-st.subheader(f"Geographical Distribution of {mineral_page} {stat_type}")
-year_filter = st.slider('Select Year', min_value=2012, max_value=2022, value=2012)
-df_choropleth = df_filtered[df_filtered['Year'] == str(year_filter)]
-choropleth_map = px.choropleth(df_choropleth, locations="Country", locationmode='country names', 
-                               color="Metric Ton", hover_name="Country", 
-                               color_continuous_scale=px.colors.sequential.Plasma,
-                               title=f"Geographical Distribution of {mineral_page} {stat_type} in {year_filter}")
-choropleth_map.update_layout(template='plotly_dark', title_font=dict(size=24), 
-                             font=dict(family="Arial", size=14))
-st.plotly_chart(choropleth_map)
-
-# Optionally show raw data
-if st.checkbox('Show Raw Data'):
-    st.write(df_filtered)
+# Country names are resolved to ISO3 codes once through a cached lookup table
+# (see utils/countries.py) instead of Plotly matching names on every build
+map_years = list(range(2012, 2023))
+map_version = (data_version, iso3_version())
+
+# Sub-commodities are in different units (e.g. metal and oxides), so the map
+# shows one of them at a time
+def year_totals(df, sub_commodity):
+    df = df[df['Sub-commodity'] == sub_commodity]
+    totals = df.groupby(['Country', 'Year'], observed=True)['Metric Ton'].sum().reset_index()
+    totals['ISO3'] = to_iso3(totals['Country']).to_numpy()
+    return totals.dropna(subset=['ISO3'])
+
+# One figure with a frame per year: scrubbing the years runs in the browser only
+def build_animated_choropleth(sub_commodity):
+    totals = year_totals(df_filtered, sub_commodity)
+    zmax = totals['Metric Ton'].max() if not totals.empty else 1
+
+    def year_trace(year):
+        rows = totals[totals['Year'] == year]
+        return go.Choropleth(locations=rows['ISO3'], z=rows['Metric Ton'], text=rows['Country'],
+                             zmin=0, zmax=zmax, colorscale='Plasma', colorbar=dict(title='Metric Ton'),
+                             hovertemplate='%{text}<br>%{z:,} Metric Ton<extra></extra>')
+
+    frame_args = dict(mode='immediate', frame=dict(duration=600, redraw=True), transition=dict(duration=0))
+    choropleth_map = go.Figure(data=[year_trace(map_years[0])],
+                               frames=[go.Frame(data=[year_trace(year)], name=str(year)) for year in map_years])
+    choropleth_map.update_layout(
+        title=f"Geographical Distribution of {mineral_page} {stat_type} ({sub_commodity}), {map_years[0]}-{map_years[-1]}",
+        template='plotly_dark', title_font=dict(size=24), font=dict(family="Arial", size=14),
+        updatemenus=[dict(type='buttons', direction='left', x=0.1, y=0, xanchor='right', yanchor='top',
+                          pad=dict(r=10, t=70), showactive=False,
+                          buttons=[dict(label='Play', method='animate', args=[None, dict(frame_args, fromcurrent=True)]),
+                                   dict(label='Pause', method='animate', args=[[None], dict(frame_args, frame=dict(duration=0, redraw=False))])])],
+        sliders=[dict(active=0, x=0.1, len=0.9, y=0, pad=dict(t=50), currentvalue=dict(prefix='Year: '),
+                      steps=[dict(label=str(year), method='animate',
+                                  args=[[str(year)], dict(frame_args, frame=dict(duration=0, redraw=True))])
+                             for year in map_years])])
+    return choropleth_map
+
+# Runs as a fragment: switching the map mode or moving the single year slider
+# re-executes only this section, not the data loading and the line and bar charts above
+@profiled_fragment('year slider')
+def choropleth_section():
+    st.subheader(f"Geographical Distribution of {mineral_page} {stat_type}")
+    map_commodities = df_filtered['Sub-commodity'].unique().tolist()
+    if not map_commodities:
+        st.write("No data available for the selected filters.")
+        return
+    mode_column, commodity_column = st.columns(2)
+    with mode_column:
+        map_mode = st.radio('Map mode', ['Animated (all years)', 'Single year'], horizontal=True)
+    with commodity_column:
+        map_commodity = st.selectbox('Map Sub-commodity', map_commodities)
+
+    if map_mode == 'Animated (all years)':
+        choropleth_map = cached_figure('choropleth animated', map_version,
+                                       lambda: build_animated_choropleth(map_commodity),
+                                       sub_commodity=map_commodity, **chart_selection)
+        with span('render'):
+            st.plotly_chart(choropleth_map)
+        return
+
+    year_filter = st.slider('Select Year', min_value=map_years[0], max_value=map_years[-1], value=map_years[0])
+
+    def build_choropleth_map():
+        df_choropleth = cube.year_slice(year_filter)
+        df_choropleth = df_choropleth[df_choropleth['Country'].isin(selected_countries)]
+        df_choropleth = df_choropleth[df_choropleth['Sub-commodity'] == map_commodity]
+        df_choropleth = df_choropleth.assign(ISO3=to_iso3(df_choropleth['Country']).to_numpy()).dropna(subset=['ISO3'])
+        choropleth_map = px.choropleth(df_choropleth, locations="ISO3",
+                                       color="Metric Ton", hover_name="Country", 
+                                       color_continuous_scale=px.colors.sequential.Plasma,
+                                       title=f"Geographical Distribution of {mineral_page} {stat_type} ({map_commodity}) in {year_filter}")
+        choropleth_map.update_layout(template='plotly_dark', title_font=dict(size=24), 
+                                     font=dict(family="Arial", size=14))
+        return choropleth_map
+
+    choropleth_map = cached_figure('choropleth', map_version, build_choropleth_map, year=year_filter,
+                                   sub_commodity=map_commodity, **chart_selection)
+    with span('render'):
+        st.plotly_chart(choropleth_map)
+
+choropleth_section()
+
+# Trade analytics: export, import and production of the mineral aligned per
+# country, sub-commodity and year, with the derived metrics precomputed per
+# dataset version (see utils/trade_analytics.py). Sub-commodities are in
+# different units, so every view shows one of them.
+# Switching views re-executes only this fragment.
+analytics_views = ["Net Trade Balance", "Apparent Consumption", "Year-over-Year Growth", "CAGR",
+                   "Market Share & Concentration", "Supply Risk Across Minerals"]
+
+def country_rows(frame, columns, countries):
+    rows = frame[columns].reset_index()
+    rows['country'] = rows['country'].astype(str)
+    return rows[rows['country'].isin(countries)].rename(columns={'country': 'Country', 'year': 'Year'})
+
+@profiled_fragment('trade analytics')
+def trade_analytics_section():
+    st.subheader(f"Trade Analytics for {mineral_page}")
+    with span('load'):
+        trade = get_trade_cube(mineral_page)
+    view = st.radio('Analytics View', analytics_views, horizontal=True)
+    countries = list(map(str, selected_countries))
+    layout = dict(template='plotly_dark', title_font=dict(size=24), font=dict(family="Arial", size=14))
+
+    if view == "Supply Risk Across Minerals":
+        st.write("Supply concentration of each mineral and sub-commodity in its latest well-reported year. "
+                 f"Sub-commodities reported by fewer than {MIN_REPORTERS} countries in every year are left out.")
+        with span('aggregate'):
+            summary = supply_risk_summary()
+        st.dataframe(summary, hide_index=True, column_config={'Top Share': st.column_config.NumberColumn(format="%.3f")})
+
+        def build_risk_chart():
+            chart = px.bar(summary, x='Sub-commodity', y='HHI', color='Flow', barmode='group', facet_col='Mineral',
+                           hover_data=['Year', 'Top Supplier', 'Top Share'],
+                           title="Supply Concentration Across Minerals (HHI)")
+            chart.update_xaxes(matches=None)
+            chart.update_layout(**layout)
+            return chart
+
+        chart = cached_figure('supply risk', tuple(get_trade_cube(mineral).version for mineral in MINERALS), build_risk_chart)
+        with span('render'):
+            st.plotly_chart(chart)
+        return
+
+    if view == "Net Trade Balance":
+        options = trade.trade_commodities
+        missing = "The export and import datasets share no sub-commodities."
+    elif view == "Apparent Consumption":
+        options = trade.consumption_commodities
+        missing = (f"The production, export and import datasets of {mineral_page} share no sub-commodities "
+                   "(production is reported as e.g. ores or concentrates), so apparent consumption cannot be "
+                   "computed without adding up different units.")
+    else:
+        options = trade.commodities(stat_type)
+        missing = f"No {stat_type.lower()} data available."
+    if not options:
+        st.write(missing)
+        return
+    sub_commodity = st.selectbox('Analytics Sub-commodity', options)
+    subject = f"{mineral_page} ({sub_commodity})"
+
+    if view == "Net Trade Balance":
+        st.write("Exports minus imports; negative values are net imports.")
+
+        def build_net_trade_chart():
+            rows = country_rows(trade.select(trade.trade, sub_commodity), ['net_trade'], countries)
+            chart = px.bar(rows, x='Year', y='net_trade', color='Country', barmode='group',
+                           labels={'net_trade': 'Net Trade (Metric Ton)'}, title=f"Net Trade Balance of {subject}")
+            chart.update_layout(**layout)
+            return chart
+
+        chart = cached_figure('net trade', trade.version, build_net_trade_chart, sub_commodity=sub_commodity,
+                              countries=countries)
+
+    elif view == "Apparent Consumption":
+        st.write("Production plus imports minus exports, with unreported flows counted as zero.")
+
+        def build_consumption_chart():
+            rows = country_rows(trade.select(trade.consumption, sub_commodity), ['apparent_consumption'], countries)
+            chart = px.line(rows, x='Year', y='apparent_consumption', color='Country', markers=True,
+                            labels={'apparent_consumption': 'Apparent Consumption (Metric Ton)'},
+                            title=f"Apparent Consumption of {subject}")
+            chart.update_layout(**layout)
+            return chart
+
+        chart = cached_figure('consumption', trade.version, build_consumption_chart, sub_commodity=sub_commodity,
+                              countries=countries)
+
+    elif view == "Year-over-Year Growth":
+        def build_growth_chart():
+            rows = country_rows(trade.select(trade.growth, sub_commodity), [stat_type], countries)
+            chart = px.line(rows, x='Year', y=stat_type, color='Country', markers=True,
+                            labels={stat_type: 'Change from Previous Year'},
+                            title=f"Year-over-Year Growth of {subject} {stat_type}")
+            chart.update_layout(yaxis_tickformat='.0%', **layout)
+            return chart
+
+        chart = cached_figure('growth', trade.version, build_growth_chart, flow=stat_type, sub_commodity=sub_commodity,
+                              countries=countries)
+
+    elif view == "CAGR":
+        years = trade.years(stat_type, sub_commodity)
+        if len(years) < 2:
+            st.write("Not enough years of data to compute growth rates.")
+            return
+        first, last = st.select_slider('Period', options=years, value=(years[0], years[-1]))
+
+        def build_cagr_chart():
+            rates = trade.cagr(stat_type, sub_commodity, first, last).head(15)
+            rows = rates.rename('CAGR').rename_axis('Country').reset_index()
+            rows['Country'] = rows['Country'].astype(str)
+            chart = px.bar(rows, x='Country', y='CAGR',
+                           title=f"Compound Annual Growth of {subject} {stat_type}, {first}-{last} (top 15)")
+            chart.update_layout(yaxis_tickformat='.0%', **layout)
+            return chart
+
+        chart = cached_figure('cagr', trade.version, build_cagr_chart, flow=stat_type, sub_commodity=sub_commodity,
+                              first=first, last=last)
+
+    else:
+        st.write("Share of the world total reported each year, and the Herfindahl-Hirschman index "
+                 "(above 2,500 is usually considered highly concentrated).")
+
+        def build_share_chart():
+            rows = country_rows(trade.select(trade.shares, sub_commodity), [stat_type], countries)
+            chart = px.line(rows, x='Year', y=stat_type, color='Country', markers=True,
+                            labels={stat_type: 'World Market Share'},
+                            title=f"Market Share in {subject} {stat_type}")
+            chart.update_layout(yaxis_tickformat='.0%', **layout)
+            return chart
+
+        def build_concentration_chart():
+            rows = trade.select(trade.concentration, sub_commodity).rename_axis('Year').reset_index()
+            rows = rows.melt(id_vars='Year', var_name='Flow', value_name='HHI').dropna()
+            chart = px.line(rows, x='Year', y='HHI', color='Flow', markers=True,
+                            title=f"Market Concentration of {subject} (HHI)")
+            chart.update_layout(**layout)
+            return chart
+
+        share_chart = cached_figure('share', trade.version, build_share_chart, flow=stat_type,
+                                    sub_commodity=sub_commodity, countries=countries)
+        with span('render'):
+            st.plotly_chart(share_chart)
+        chart = cached_figure('concentration', trade.version, build_concentration_chart, sub_commodity=sub_commodity)
+
+    with span('render'):
+        st.plotly_chart(chart)
+
+trade_analytics_section()
+
+# Optionally show raw data, toggling it only re-executes this fragment
+@profiled_fragment('raw data')
+def raw_data_section():
+    if st.checkbox('Show Raw Data'):
+        data_grid(df_filtered, key='statistics_grid', file_name=f'{mineral_page}_{stat_type}'.replace(' ', '_'),
+                  version=(mineral_page, stat_type, data_version),
+                  selection=(tuple(map(str, selected_countries)), tuple(commodity_filter)))
+
+raw_data_section()
+
+finish_run()
@@ -1,12 +1,26 @@
-import pandas as pd
+import numpy as np
 import streamlit as st
 import folium
 from streamlit_folium import st_folium
-from folium.plugins import MarkerCluster
+
+from utils.data_grid import data_grid
+from utils.data_loader import file_version, load_deposits
+from utils.deposit_map import deposit_layer
+from utils.deposit_search import deposit_search_index
+from utils.instrumentation import finish_run, profiled_fragment, span, start_run
+from utils.registry import dataset_path
+from utils.spatial_index import deposit_index, padded_viewport
+
+start_run("Global Mining Deposits")
 
 # Step 1: Load Data
-file_path = "data/Global Mineral Mining Stations.csv"
-data = pd.read_csv(file_path)
+with span('load'):
+    file_path = dataset_path('Global Mineral Mining Stations')
+    data = load_deposits(file_path)
+    # Spatial index over all deposits, built once per data version
+    index = deposit_index(file_path)
+    # Word index and per-value row bitmaps for search and filters, built once per data version
+    search_index = deposit_search_index(file_path)
 
 # Step 2: Streamlit Page Setup
 st.set_page_config(page_title="Global Mineral Mining Dashboard", layout="wide")
@@ -15,51 +29,108 @@ st.title("Global Mineral Mining Dashboard")
 st.markdown("Explore global mineral mining deposit locations, critical minerals, and deposit types.")
 
 # Step 3: Filters
+# Options come precomputed from the search index instead of sorting the columns on every run
 with st.container():
+    search_query = st.text_input('Search Deposits', placeholder='Name, country, region, mineral or deposit type, e.g. gallium china')
     left, middle, right = st.columns(3)
     with left:
-        country_filter = st.selectbox('Select Country', options=['All'] + sorted(data['LOCATION'].unique().tolist()))
+        country_filter = st.selectbox('Select Country', options=['All'] + search_index.facet_options('LOCATION'))
     with middle:
-        critical_mineral_filter = st.multiselect('Select Critical Minerals', options=sorted(data['CRITICAL_M'].dropna().unique().tolist()))
+        critical_mineral_filter = st.multiselect('Select Critical Minerals', options=search_index.facet_options('CRITICAL_M'))
     with right:
-        deposit_type_filter = st.selectbox('Select Deposit Type', options=['All'] + sorted(data['DEPOSIT_TY'].unique().tolist()))
+        deposit_type_filter = st.selectbox('Select Deposit Type', options=['All'] + search_index.facet_options('DEPOSIT_TY'))
 
-    st.caption("Filter data using the dropdowns above.")
+    st.caption("Search by words or their beginnings (small typos are tolerated), then press Enter; filter data using the dropdowns above.")
 
 # Step 4: Data Filtering
-filtered_data = data.copy()
-
-if country_filter != 'All':
-    filtered_data = filtered_data[filtered_data['LOCATION'] == country_filter]
-
-if len(critical_mineral_filter) > 0:
-    filtered_data = filtered_data[filtered_data['CRITICAL_M'].isin(critical_mineral_filter)]
-
-if deposit_type_filter != 'All':
-    filtered_data = filtered_data[filtered_data['DEPOSIT_TY'] == deposit_type_filter]
-
-# Step 5: Map Creation
-m = folium.Map(location=[20, 0], zoom_start=2, tiles="CartoDB positron")
-
-# Add Marker Cluster
-marker_cluster = MarkerCluster().add_to(m)
-
-# Step 6: Add Markers to Map
-for _, row in filtered_data.iterrows():
-    popup_text = f"""
-    <b>Deposit Name:</b> {row['DEPOSIT_NA']}<br>
-    <b>Location:</b> {row['LOCATION']} - {row['LOC_DETAIL']}<br>
-    <b>Critical Minerals:</b> {row['CRITICAL_M']}<br>
-    <b>Deposit Type:</b> {row['DEPOSIT_TY']}
-    """
-    folium.Marker(
-        location=[row['LATITUDE'], row['LONGITUDE']],
-        popup=popup_text,
-        icon=folium.Icon(color='blue', icon='info-sign')
-    ).add_to(marker_cluster)
-
-# Step 7: Display Map
-st_folium(m, width=1000, height=500)
-
-# Display the filtered data as a table
-st.write("Filtered Data:", filtered_data)
+# The dropdown filters intersect precomputed row bitmaps; the search ranks the remaining rows by relevance
+with span('filter'):
+    filter_mask = search_index.facet_mask(LOCATION=None if country_filter == 'All' else country_filter,
+                                          CRITICAL_M=critical_mineral_filter,
+                                          DEPOSIT_TY=None if deposit_type_filter == 'All' else deposit_type_filter)
+
+    if search_query.strip():
+        match_positions = search_index.search(search_query, mask=filter_mask)
+        filter_mask = np.zeros(len(data), dtype=bool)
+        filter_mask[match_positions] = True
+        filtered_data = data.iloc[match_positions]
+    else:
+        filtered_data = data[filter_mask]
+
+# Best matches for the search, right below the search box
+if search_query.strip():
+    st.caption(f"{len(filtered_data):,} deposits match \"{search_query.strip()}\".")
+    st.dataframe(filtered_data.head(10)[['DEPOSIT_NA', 'LOCATION', 'LOC_DETAIL', 'CRITICAL_M', 'DEPOSIT_TY']], hide_index=True)
+
+# The map and the nearby search run as fragments: panning the map or changing
+# the search inputs re-executes only that section, not the filters and the table
+@profiled_fragment('map')
+def deposit_map_section():
+    # Step 5: Restrict the map to the current viewport
+    # Only deposits inside the last reported map bounds (plus a margin) are sent to the browser.
+    with span('spatial query'):
+        map_state = st.session_state.get('deposits_map') or {}
+        viewport = padded_viewport(map_state.get('bounds'))
+        if viewport is None:
+            visible_positions = np.flatnonzero(filter_mask)
+        else:
+            visible_positions = index.within_bbox(*viewport)
+            visible_positions = visible_positions[filter_mask[visible_positions]]
+        visible_data = data.iloc[visible_positions]
+
+    # Step 6: Map Creation
+    m = folium.Map(location=[20, 0], zoom_start=2, tiles="CartoDB positron")
+
+    # Step 7: Add Markers to Map
+    # All markers are sent as one cached payload per filter combination and viewport and built in the browser.
+    # The markers live in a feature group so panning swaps them without reloading the map.
+    layer_key = (file_version(file_path), search_query.strip(), country_filter, tuple(sorted(critical_mineral_filter)), deposit_type_filter, viewport)
+    deposit_group = folium.FeatureGroup(name="Deposits")
+    with span('figure: deposit layer'):
+        deposit_layer(layer_key, visible_data).add_to(deposit_group)
+
+    # Step 8: Display Map
+    with span('render'):
+        st_folium(m, key='deposits_map', feature_group_to_add=deposit_group, returned_objects=['bounds'], width=1000, height=500)
+    st.caption(f"Showing {len(visible_data):,} of {len(filtered_data):,} matching deposits in the current view.")
+
+deposit_map_section()
+
+@profiled_fragment('nearby search')
+def nearby_deposits_section():
+    # Step 9: Nearby Deposits
+    with st.expander("Find Deposits Near a Location"):
+        st.caption("Searches all deposits. Defaults to Binh Thuan province, Vietnam.")
+        lat_column, lon_column, k_column, radius_column = st.columns(4)
+        with lat_column:
+            near_lat = st.number_input('Latitude', min_value=-90.0, max_value=90.0, value=11.09)
+        with lon_column:
+            near_lon = st.number_input('Longitude', min_value=-180.0, max_value=180.0, value=108.07)
+        with k_column:
+            near_k = st.number_input('Number of Deposits', min_value=1, max_value=100, value=10)
+        with radius_column:
+            near_radius = st.number_input('Within km (0 = no limit)', min_value=0, max_value=20000, value=0)
+
+        if near_radius > 0:
+            near_positions, near_distances = index.within_radius(near_lat, near_lon, near_radius)
+            near_positions, near_distances = near_positions[:near_k], near_distances[:near_k]
+        else:
+            near_positions, near_distances = index.nearest(near_lat, near_lon, near_k)
+
+        nearby_data = data.iloc[near_positions][['DEPOSIT_NA', 'LOCATION', 'LOC_DETAIL', 'CRITICAL_M', 'DEPOSIT_TY']]
+        st.dataframe(nearby_data.assign(DISTANCE_KM=near_distances.round(1)), hide_index=True)
+
+nearby_deposits_section()
+
+# Display the filtered data as a paged table; the long wkt_geom strings are
+# left out unless picked in the column selection
+@profiled_fragment('data grid')
+def filtered_data_section():
+    st.write("Filtered Data:")
+    data_grid(filtered_data, key='deposits_grid', columns=[c for c in data.columns if c != 'wkt_geom'],
+              file_name='mining_deposits', version=file_version(file_path),
+              selection=(search_query.strip(), country_filter, tuple(sorted(critical_mineral_filter)), deposit_type_filter))
+
+filtered_data_section()
+
+finish_run()
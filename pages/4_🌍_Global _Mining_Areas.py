@@ -1,13 +1,30 @@
-import pandas as pd
+import folium
 import plotly.express as px
 import streamlit as st
+from streamlit_folium import st_folium
 
-# Load the data
-data_path = 'data/global_mining_area_per_country_v2.csv'
-df = pd.read_csv(data_path)
+from utils.data_grid import data_grid
+from utils.data_loader import file_version, load_mining_areas
+from utils.figure_cache import cached_figure
+from utils.instrumentation import finish_run, profiled_fragment, span, start_run
+from utils.mining_polygons import polygon_store
+from utils.registry import dataset_path, optional_dataset_path
+from utils.spatial_index import padded_viewport
+
+start_run("Global Mining Areas")
 
-# Clean the column names: Strip whitespace from the names
-df.columns = df.columns.str.strip()
+# Load the data
+# When the mine polygon file is present the per-country totals are derived from
+# it (see utils/mining_polygons.py), otherwise they come from the summary CSV
+with span('load'):
+    polygons = polygon_store(optional_dataset_path('Global Mining Polygons'))
+    if polygons is not None:
+        data_version = polygons.version
+        df = polygons.country_totals()
+    else:
+        data_path = dataset_path('Global Mining Areas')
+        data_version = file_version(data_path)
+        df = load_mining_areas(data_path)
 
 # Initialize the Streamlit app
 st.title("Global Mining Area Dashboard")
@@ -16,26 +33,62 @@ st.title("Global Mining Area Dashboard")
 country_filter = st.sidebar.multiselect('Select Countries', options=df['COUNTRY_NAME'].unique(), default=df['COUNTRY_NAME'].unique())
 
 # Filter the dataframe based on selections
-df_filtered = df[df['COUNTRY_NAME'].isin(country_filter)]
+with span('filter'):
+    df_filtered = df[df['COUNTRY_NAME'].isin(country_filter)]
+
+# Display raw data if needed, toggling it or paging only re-executes this fragment
+@profiled_fragment('raw data')
+def raw_data_section():
+    if st.checkbox('Show Raw Data'):
+        data_grid(df_filtered, key='mining_areas_grid', file_name='mining_areas', version=data_version,
+                  selection=tuple(country_filter))
 
-# Display raw data if needed
-if st.checkbox('Show Raw Data'):
-    st.write(df_filtered)
+raw_data_section()
 
 # Choropleth Map: Geographical Visualization of Mining Area
 st.subheader("Choropleth Map: Total Mining Area by Country")
 
-# Plotly Choropleth Map
-choropleth_map = px.choropleth(df_filtered, 
-                               locations="ISO3_CODE", 
-                               locationmode="ISO-3",
-                               color="AREA",
-                               hover_name="COUNTRY_NAME",
-                               color_continuous_scale=px.colors.sequential.Plasma,
-                               labels={'AREA': 'Mining Area (sq km)'},
-                               title="Mining Area (sq km) by Country")
-
-st.plotly_chart(choropleth_map)
+# Plotly Choropleth Map, cached per data version and country selection
+def build_choropleth_map():
+    return px.choropleth(df_filtered, 
+                         locations="ISO3_CODE", 
+                         locationmode="ISO-3",
+                         color="AREA",
+                         hover_name="COUNTRY_NAME",
+                         color_continuous_scale=px.colors.sequential.Plasma,
+                         labels={'AREA': 'Mining Area (sq km)'},
+                         title="Mining Area (sq km) by Country")
+
+choropleth_map = cached_figure('choropleth', data_version, build_choropleth_map, countries=country_filter)
+with span('render'):
+    st.plotly_chart(choropleth_map)
+
+# Mine polygons of the selected countries. Only the tiles overlapping the current
+# viewport are sent, simplified to the level of detail for the current zoom.
+# Runs as a fragment: panning and zooming re-execute only this section.
+@profiled_fragment('polygon map')
+def polygon_map_section():
+    st.subheader("Mining Areas Map")
+    map_state = st.session_state.get('mining_areas_map') or {}
+    viewport = padded_viewport(map_state.get('bounds'), margin=0.25) or (-90.0, -180.0, 90.0, 180.0)
+    with span('tile query'):
+        geojson, n_features, truncated = polygons.viewport_geojson(
+            map_state.get('zoom', 2), *viewport, countries=df_filtered['ISO3_CODE'].tolist())
+
+    m = folium.Map(location=[20, 0], zoom_start=2, tiles="CartoDB positron")
+    polygon_group = folium.FeatureGroup(name="Mining Areas")
+    if n_features > 0:
+        folium.GeoJson(geojson, style_function=lambda feature: {'color': '#d62728', 'weight': 1, 'fillOpacity': 0.5},
+                       tooltip=folium.GeoJsonTooltip(fields=['COUNTRY_NAME', 'AREA'], aliases=['Country', 'Area (sq km)'])
+                       ).add_to(polygon_group)
+    with span('render'):
+        st_folium(m, key='mining_areas_map', feature_group_to_add=polygon_group,
+                  returned_objects=['bounds', 'zoom'], width=1000, height=500)
+    note = " Zoom in to see all of them." if truncated else ""
+    st.caption(f"Showing {n_features:,} mining areas in the current view.{note}")
+
+if polygons is not None:
+    polygon_map_section()
 
 
 # Maximum and Minimum Mining Area by Country
@@ -57,27 +110,35 @@ if df_filtered.empty:
 else:
     top10_countries = df_filtered.nlargest(10, 'AREA')
 
-bar_chart = px.bar(top10_countries, 
-                   x='COUNTRY_NAME', 
-                   y='AREA', 
-                   labels={'AREA': 'Mining Area (sq km)'}, 
-                   title="Top 10 Countries by Mining Area",
-                   color='COUNTRY_NAME')
-st.plotly_chart(bar_chart)
+def build_bar_chart():
+    return px.bar(top10_countries, 
+                  x='COUNTRY_NAME', 
+                  y='AREA', 
+                  labels={'AREA': 'Mining Area (sq km)'}, 
+                  title="Top 10 Countries by Mining Area",
+                  color='COUNTRY_NAME')
+
+bar_chart = cached_figure('bar', data_version, build_bar_chart, countries=country_filter)
+with span('render'):
+    st.plotly_chart(bar_chart)
 
 # Scatter Plot: Relationship Between Mining Area and Number of Features
 st.subheader("Mining Area vs Number of Features")
 if df_filtered.empty:
     st.write("No countries selected or no data available.")
 else:
-    scatter_plot = px.scatter(df_filtered, 
+    def build_scatter_plot():
+        return px.scatter(df_filtered, 
                           x='AREA', 
                           y='N_FEATURES', 
                           labels={'AREA': 'Mining Area (sq km)', 'N_FEATURES': 'Number of Mining Features'},
                           title="Mining Area vs Number of Features by Country", 
                           hover_name="COUNTRY_NAME",
                           color="COUNTRY_NAME")
-st.plotly_chart(scatter_plot)
+
+    scatter_plot = cached_figure('scatter', data_version, build_scatter_plot, countries=country_filter)
+with span('render'):
+    st.plotly_chart(scatter_plot)
 
 # Statistical Summary
 st.subheader("Statistical Summary of Mining Areas")
@@ -86,3 +147,5 @@ if df_filtered.empty:
 else:
     st.write(f"**Average Mining Area**: {df_filtered['AREA'].mean():.2f} sq km")
     st.write(f"**Total Mining Area (Global)**: {df_filtered['AREA'].sum():.2f} sq km")
+
+finish_run()
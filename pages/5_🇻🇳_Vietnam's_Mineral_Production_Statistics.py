@@ -1,13 +1,19 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import plotly.figure_factory as ff
-import seaborn as sns
-import matplotlib.pyplot as plt
-import numpy as np
+
+from utils.data_loader import file_version, load_yearbook
+from utils.figure_cache import cached_figure
+from utils.instrumentation import finish_run, profiled_fragment, span, start_run
+from utils.registry import dataset_path
+from utils.yearbook_stats import yearbook_selection
+
+start_run("Vietnam Statistics")
 
 # Load the dataset
-df = pd.read_csv("data/Vietnam Statistical Yearbook Data.csv")
+with span('load'):
+    data_path = dataset_path('Vietnam Statistical Yearbook')
+    data_version = file_version(data_path)
+    df = load_yearbook(data_path)
 
 
 # List of minerals/resources for analysis
@@ -17,100 +23,120 @@ minerals = ["Titan ores / (for 2005-2010, its 52% TiO2) (000, tons)", "Coal (000
 # Streamlit page setup
 st.title("Vietnam Mineral Production Statistics")
 
-# Sidebar for selecting visualization type
-st.sidebar.title("Visualization Options")
-plot_type = st.sidebar.selectbox("Choose the type of plot", ["Line Charts", "Bar Charts", "Stacked Area Charts", "Heatmaps", "Box Plots", "Facet Grids"])
-
 # Sidebar for selecting minerals and year range
+st.sidebar.title("Visualization Options")
 selected_minerals = st.sidebar.multiselect("Select Minerals", minerals, default=minerals)
 selected_years = st.sidebar.slider("Select Year Range", int(df['Year'].min()), int(df['Year'].max()), (int(df['Year'].min()), int(df['Year'].max())))
 
-# Filter the data based on user selections
-df_filtered = df[(df['Year'] >= selected_years[0]) & (df['Year'] <= selected_years[1])]
-df_filtered = df_filtered[['Year'] + selected_minerals]
+# Filter the data based on user selections. The filtered frame, medians, melted
+# frame and correlation matrix are computed once per year range and selection.
+with span('filter'):
+    selection = yearbook_selection(data_path, selected_years, selected_minerals)
+    df_filtered = selection.filtered
 
 # Determine the "significant" minerals based on their median production values
 significant_threshold = 10000  # Set a threshold value
-mineral_medians = df_filtered[selected_minerals].median()
-significant_minerals = mineral_medians[mineral_medians > significant_threshold].index.tolist()
+with span('aggregate'):
+    significant_minerals = selection.significant(significant_threshold)
 
 # Show a message for default filtering
 st.write(f"By default, only minerals with median production above {significant_threshold} are shown.")
 
-# Plot 1: Line Chart - Production Trends Over Time
-if plot_type == "Line Charts":
-    st.subheader("Production Trends of Selected Minerals Over Time")
-
-     # Check if user selection exists, otherwise use significant minerals
-    if not selected_minerals:
-        selected_minerals = significant_minerals
-    
-    df_filtered_significant = df_filtered[['Year'] + selected_minerals]
-
-    line_chart = px.line(df_filtered_significant.melt(id_vars='Year', var_name='Mineral', value_name='Production'),
-                         x='Year', y='Production', color='Mineral', title="Mineral Production Trends Over Time (log scale)")
-    line_chart.update_layout(yaxis_type='log')
-    st.plotly_chart(line_chart)
-
-# Plot 2: Bar Chart - Compare Mineral Production by Year
-elif plot_type == "Bar Charts":
-    st.subheader("Comparison of Mineral Production for Selected Year")
-    selected_year = st.sidebar.selectbox("Select Year for Bar Chart", df_filtered['Year'].unique())
-    # Check if user selection exists, otherwise use significant minerals
-    if not selected_minerals:
-        selected_minerals = significant_minerals
-    df_year = df_filtered[df_filtered['Year'] == selected_year].set_index('Year').T.reset_index().rename(columns={'index': 'Mineral', selected_year: 'Production'})
-    df_year_significant = df_year[df_year['Mineral'].isin(selected_minerals)]
-    bar_chart = px.bar(df_year_significant, x='Mineral', y='Production', title=f"Mineral Production in {selected_year}(log scale)")
-    bar_chart.update_layout(yaxis_type='log')
-    st.plotly_chart(bar_chart)
-
-# Plot 3: Stacked Area Chart - Contributions to Total Production Over Time
-elif plot_type == "Stacked Area Charts":
-    st.subheader("Contributions of Minerals to Total Production Over Time")
-       # Check if user selection exists, otherwise use significant minerals
-    if not selected_minerals:
-        selected_minerals = significant_minerals
-    
-    df_filtered_significant = df_filtered[['Year'] + selected_minerals]
-    stacked_area_chart = px.area(df_filtered_significant.melt(id_vars='Year', var_name='Mineral', value_name='Production'),
-                                 x='Year', y='Production', color='Mineral', title="Total Production Contributions")
-    st.plotly_chart(stacked_area_chart)
-
-# Plot 4: Heatmap - Correlation Between Mineral Productions
-elif plot_type == "Heatmaps":
-    st.subheader("Correlation Between Mineral Production Levels")
-    df_corr = df_filtered.drop(columns='Year').corr()
-    fig, ax = plt.subplots()
-    sns.heatmap(df_corr, annot=True, cmap='coolwarm', ax=ax)
-    st.pyplot(fig)
-
-# Plot 5: Box Plot - Distribution of Production Data for Each Mineral
-elif plot_type == "Box Plots":
-    st.subheader("Statistical Distribution of Production Data for Each Mineral")
-     # Check if user selection exists, otherwise use significant minerals
-    if not selected_minerals:
-        selected_minerals = significant_minerals
-    
-    df_filtered_significant = df_filtered[['Year'] + selected_minerals]
-    box_plot = px.box(df_filtered.melt(id_vars='Year', var_name='Mineral', value_name='Production'),
-                      x='Mineral', y='Production', title="Distribution of Mineral Production (Log Scale)")
-    box_plot.update_layout(yaxis_type='log')
-    st.plotly_chart(box_plot)
-
-# Plot 6: Facet Grids - Individual Trends for Each Mineral
-elif plot_type == "Facet Grids":
-    st.subheader("Facet Grid of Production Trends for Each Mineral")
+# Charts run as a fragment: changing the plot type or the bar chart year
+# re-executes only this section, not the data loading and filtering above
+@profiled_fragment('plot type')
+def production_charts():
+    plot_type = st.selectbox("Choose the type of plot", ["Line Charts", "Bar Charts", "Stacked Area Charts", "Heatmaps", "Box Plots", "Facet Grids"])
+
     # Check if user selection exists, otherwise use significant minerals
-    if not selected_minerals:
-        selected_minerals = significant_minerals
-    
-    df_filtered_significant = df_filtered[['Year'] + selected_minerals]
-    facet_grid = px.line(df_filtered_significant.melt(id_vars='Year', var_name='Mineral', value_name='Production'),
-                         x='Year', y='Production', facet_col='Mineral', facet_col_wrap=2, title="Facet Grid of Mineral Production Trends (log scale)")
-    facet_grid.update_layout(yaxis_type="log")
-    st.plotly_chart(facet_grid)
+    chart_minerals = selected_minerals if selected_minerals else significant_minerals
+    chart_selection = yearbook_selection(data_path, selected_years, chart_minerals)
+
+    # Plot 1: Line Chart - Production Trends Over Time
+    if plot_type == "Line Charts":
+        st.subheader("Production Trends of Selected Minerals Over Time")
+
+        def build_line_chart():
+            line_chart = px.line(chart_selection.melted,
+                                 x='Year', y='Production', color='Mineral', title="Mineral Production Trends Over Time (log scale)")
+            line_chart.update_layout(yaxis_type='log')
+            return line_chart
+
+        line_chart = cached_figure('line', data_version, build_line_chart, minerals=chart_minerals, years=selected_years)
+        with span('render'):
+            st.plotly_chart(line_chart)
+
+    # Plot 2: Bar Chart - Compare Mineral Production by Year
+    elif plot_type == "Bar Charts":
+        st.subheader("Comparison of Mineral Production for Selected Year")
+        selected_year = st.selectbox("Select Year for Bar Chart", df_filtered['Year'].unique())
+        df_year = chart_selection.filtered[chart_selection.filtered['Year'] == selected_year].set_index('Year').T.reset_index().rename(columns={'index': 'Mineral', selected_year: 'Production'})
+        df_year_significant = df_year[df_year['Mineral'].isin(chart_minerals)]
+
+        def build_bar_chart():
+            bar_chart = px.bar(df_year_significant, x='Mineral', y='Production', title=f"Mineral Production in {selected_year}(log scale)")
+            bar_chart.update_layout(yaxis_type='log')
+            return bar_chart
+
+        bar_chart = cached_figure('bar', data_version, build_bar_chart, minerals=chart_minerals, year=selected_year)
+        with span('render'):
+            st.plotly_chart(bar_chart)
+
+    # Plot 3: Stacked Area Chart - Contributions to Total Production Over Time
+    elif plot_type == "Stacked Area Charts":
+        st.subheader("Contributions of Minerals to Total Production Over Time")
+
+        def build_stacked_area_chart():
+            return px.area(chart_selection.melted,
+                           x='Year', y='Production', color='Mineral', title="Total Production Contributions")
+
+        stacked_area_chart = cached_figure('area', data_version, build_stacked_area_chart, minerals=chart_minerals, years=selected_years)
+        with span('render'):
+            st.plotly_chart(stacked_area_chart)
+
+    # Plot 4: Heatmap - Correlation Between Mineral Productions
+    elif plot_type == "Heatmaps":
+        st.subheader("Correlation Between Mineral Production Levels")
+        if selection.correlation.empty:
+            st.write("Select at least one mineral to see their correlations.")
+        else:
+            with span('figure: heatmap'):
+                heatmap = selection.heatmap_png()
+            with span('render'):
+                st.image(heatmap, use_column_width=True)
+
+    # Plot 5: Box Plot - Distribution of Production Data for Each Mineral
+    elif plot_type == "Box Plots":
+        st.subheader("Statistical Distribution of Production Data for Each Mineral")
+
+        def build_box_plot():
+            box_plot = px.box(selection.melted,
+                              x='Mineral', y='Production', title="Distribution of Mineral Production (Log Scale)")
+            box_plot.update_layout(yaxis_type='log')
+            return box_plot
+
+        box_plot = cached_figure('box', data_version, build_box_plot, minerals=list(df_filtered.columns[1:]), years=selected_years)
+        with span('render'):
+            st.plotly_chart(box_plot)
+
+    # Plot 6: Facet Grids - Individual Trends for Each Mineral
+    elif plot_type == "Facet Grids":
+        st.subheader("Facet Grid of Production Trends for Each Mineral")
+
+        def build_facet_grid():
+            facet_grid = px.line(chart_selection.melted,
+                                 x='Year', y='Production', facet_col='Mineral', facet_col_wrap=2, title="Facet Grid of Mineral Production Trends (log scale)")
+            facet_grid.update_layout(yaxis_type="log")
+            return facet_grid
+
+        facet_grid = cached_figure('facet', data_version, build_facet_grid, minerals=chart_minerals, years=selected_years)
+        with span('render'):
+            st.plotly_chart(facet_grid)
+
+production_charts()
 
 # Add some footer information
 st.write("#### Data Source: Vietnam Statistical Yearbook Data")
 st.write("#### Analysis by Kazi Nafiul Hassan - 2024")
+
+finish_run()
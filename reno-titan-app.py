@@ -1,24 +1,33 @@
-from PIL import Image
 import streamlit as st
-import requests
 from streamlit_lottie import st_lottie
 
+from utils.aggregates import build_all_cubes_in_background
+from utils.assets import load_image, load_lottie_animations
+from utils.instrumentation import finish_run, span, start_run
+
 st.set_page_config(
     page_title="RENO-TITAN",
     page_icon=":radioactive:",
 )
 
-def load_lottieurl(url):
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None
-    return r.json()
+start_run("Home")
+
+# Prepare the Mineral Statistics aggregates while the landing page is read
+build_all_cubes_in_background()
 
-img_config = Image.open("images/pic4.jpg")
-img_config2 = Image.open("images/germany.png")
-img_config3 = Image.open("images/vietnam.png")
-radioation = load_lottieurl("https://lottie.host/630b7392-1f8d-43a3-8a11-bc3591e69e5a/UdDPV3Yr3V.json")
-mining_animation = load_lottieurl("https://lottie.host/6e9f2ae6-fb3a-450b-a176-e40dcccc5b31/v8sfrmz9IJ.json")
+# Images are decoded once per process; animations are cached on disk and replaced by a static image offline
+with span('load images'):
+    img_config = load_image("images/pic4.jpg")
+    img_config2 = load_image("images/germany.png")
+    img_config3 = load_image("images/vietnam.png")
+    img_offline = load_image("images/radiation.png")
+with span('load animations'):
+    animations = load_lottie_animations({
+        "radiation": "https://lottie.host/630b7392-1f8d-43a3-8a11-bc3591e69e5a/UdDPV3Yr3V.json",
+        "mining": "https://lottie.host/6e9f2ae6-fb3a-450b-a176-e40dcccc5b31/v8sfrmz9IJ.json",
+    })
+radioation = animations["radiation"]
+mining_animation = animations["mining"]
 
 
 with st.container():
@@ -29,8 +38,12 @@ with st.container():
         st.write("RENO-TITAN is an international research project on the development of sustainable disposal methods and possible re-use of naturally radioactive material (NORM) from the extraction and processing of titanium from heavy sand in Vietnam. The project aims to integrate environmental aspects, establish a regulatory framework and investigate technological solutions for the management of radioactive residues in the Vietnamese titanium industry.")
         st.image(img_config)
     with right_column:
-        st_lottie(radioation, height=200, key="radiation")
-        st_lottie(mining_animation, height=300, key="mining")
+        if radioation:
+            st_lottie(radioation, height=200, key="radiation")
+        if mining_animation:
+            st_lottie(mining_animation, height=300, key="mining")
+        if not radioation and not mining_animation:
+            st.image(img_offline, width=200)
     st.sidebar.success("Select a page above.")
     left_column, right_column = st.columns(2)
 
@@ -49,3 +62,4 @@ with st.container():
     st.header("Funding")
     st.write("RENO-TITAN is funded by the German Federal Ministry of Education and Research (BMBF) as part of the Client II programme and will run from April 2023 to March 2026 with the aim of making the Vietnamese titanium industry more sustainable and environmentally friendly.")
 
+finish_run()
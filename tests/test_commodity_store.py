@@ -0,0 +1,32 @@
+import pandas as pd
+
+from utils import data_loader
+from utils.commodity_store import get_store
+from utils.registry import statistics_datasets
+
+
+def _deep_size(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+# The store's categorical table and views are the only copy of the statistics
+# datasets held in memory, and much smaller than the melted frames
+def test_store_is_the_only_resident_copy():
+    store = get_store()
+    paths = set(statistics_datasets().values())
+    assert not paths & set(data_loader._frames)
+
+    views = [store.statistics_view(mineral, flow) for mineral, flow in store.versions]
+    resident = store.memory_usage() + sum(_deep_size(view) for view in views)
+    melted = sum(_deep_size(data_loader.load_and_clean_data(path)) for path in paths)
+    assert resident < melted / 4
+    assert not paths & set(data_loader._frames)
+
+
+def test_statistics_view_is_a_categorical_slice():
+    store = get_store()
+    view = store.statistics_view('Titanium', 'Export')
+    assert isinstance(view['Country'].dtype, pd.CategoricalDtype)
+    assert isinstance(view['Sub-commodity'].dtype, pd.CategoricalDtype)
+    assert set(view['Country'].cat.categories) == set(view['Country'])
+    assert store.statistics_view('Titanium', 'Export') is view
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from utils.trade_analytics import MIN_REPORTERS, TradeCube, supply_risk_records
+
+
+# Rows in the layout of CommodityStore.query. Metal and Ore are in different
+# units, Ore in much larger amounts, so any metric that adds them up is off.
+def _rows(records):
+    df = pd.DataFrame(records, columns=['flow', 'country', 'sub_commodity', 'year', 'tonnes'])
+    return df.astype({'flow': 'category', 'country': 'category', 'sub_commodity': 'category',
+                      'year': 'int16', 'tonnes': 'float32'})
+
+
+@pytest.fixture
+def cube():
+    return TradeCube(_rows([
+        ('Export', 'A', 'Metal', 2020, 10), ('Export', 'A', 'Metal', 2021, 20),
+        ('Export', 'B', 'Metal', 2020, 30), ('Export', 'B', 'Metal', 2021, 30),
+        ('Export', 'A', 'Ore', 2020, 1000), ('Export', 'A', 'Ore', 2021, 1000),
+        ('Export', 'B', 'Ore', 2020, 1000), ('Export', 'B', 'Ore', 2021, 3000),
+        ('Import', 'A', 'Metal', 2020, 5), ('Import', 'A', 'Metal', 2021, 5),
+        ('Import', 'B', 'Ore', 2020, 500),
+        ('Production', 'A', 'Metal', 2020, 50), ('Production', 'A', 'Metal', 2021, 50),
+        ('Production', 'A', 'Sand', 2020, 9000),
+    ]))
+
+
+def test_commodity_lists(cube):
+    assert cube.commodities('Export') == ['Metal', 'Ore']
+    assert cube.trade_commodities == ['Metal', 'Ore']
+    assert cube.consumption_commodities == ['Metal']
+
+
+def test_metrics_stay_within_one_sub_commodity(cube):
+    assert cube.trade.loc[('A', 'Metal', 2020), 'net_trade'] == 5
+    assert cube.trade.loc[('B', 'Ore', 2020), 'net_trade'] == 500
+    assert cube.consumption.loc[('A', 'Metal', 2020), 'apparent_consumption'] == 45
+    assert cube.growth.loc[('A', 'Metal', 2021), 'Export'] == pytest.approx(1.0)
+    assert cube.shares.loc[('A', 'Metal', 2020), 'Export'] == pytest.approx(0.25)
+    assert cube.concentration.loc[('Metal', 2020), 'Export'] == pytest.approx(6250)
+    assert cube.concentration.loc[('Ore', 2021), 'Export'] == pytest.approx(6250)
+    assert cube.cagr('Export', 'Metal', 2020, 2021)['A'] == pytest.approx(1.0)
+    assert cube.leaders('Export', 'Ore', 2021, n=1).index[0] == 'B'
+
+
+def test_supply_risk_requires_min_reporters_per_sub_commodity():
+    countries = [f"C{i}" for i in range(MIN_REPORTERS)]
+    cube = TradeCube(_rows(
+        [('Export', country, 'Metal', 2020, 10) for country in countries]
+        + [('Export', 'C0', 'Ore', 2021, 1000)]
+    ))
+    records = supply_risk_records('Test', cube)
+    assert [(record['Sub-commodity'], record['Year']) for record in records] == [('Metal', 2020)]
+    assert records[0]['HHI'] == pytest.approx(10_000 / MIN_REPORTERS, abs=0.1)
@@ -0,0 +1,118 @@
+import sys
+import threading
+import time
+
+import pandas as pd
+
+from utils.commodity_store import get_store
+from utils.data_loader import file_version
+from utils.instrumentation import log_exception
+from utils.registry import statistics_datasets
+
+_cubes = {}
+_lock = threading.Lock()
+_warmup = None
+
+
+# Precomputed aggregates for one statistics dataset (one mineral and flow).
+# Everything the dashboard asks for is materialised once per file version so
+# views answer it with index lookups on small tables instead of scanning the
+# melted frame.
+class DatasetCube:
+    def __init__(self, df, version=None):
+        self.version = version
+        values = df.dropna(subset=['Metric Ton'])
+
+        # Total per country over all sub-commodities and years, largest first
+        self.country_totals = values.groupby('Country', observed=True)['Metric Ton'].sum().sort_values(ascending=False, kind='stable')
+
+        # Total per (country, sub-commodity) and per (country, year)
+        self.pair_totals = values.groupby(['Country', 'Sub-commodity'], sort=False, observed=True)['Metric Ton'].sum()
+        self.country_year_totals = values.groupby(['Country', 'Year'], observed=True)['Metric Ton'].sum()
+
+        # Maximum per (country, sub-commodity) together with the year it occurred in
+        pair_max = values.loc[values.groupby(['Country', 'Sub-commodity'], sort=False, observed=True)['Metric Ton'].idxmax()]
+        self.pair_max = pair_max.reset_index(drop=True)
+
+        # Rows of each year, used for the per-year map
+        self.year_slices = {year: rows.reset_index(drop=True) for year, rows in df.groupby('Year', sort=False)}
+
+    # Countries with the largest totals
+    def top_countries(self, n=3):
+        return self.country_totals.index[:n]
+
+    # Largest value within an optional selection of countries and sub-commodities.
+    # Returns (value, country, sub-commodity, year) or None when nothing matches.
+    def max_entry(self, countries=None, commodities=None):
+        candidates = self.pair_max
+        if countries is not None and len(countries) > 0:
+            candidates = candidates[candidates['Country'].isin(countries)]
+        if commodities is not None and len(commodities) > 0:
+            candidates = candidates[candidates['Sub-commodity'].isin(commodities)]
+        if candidates.empty:
+            return None
+        row = candidates.loc[candidates['Metric Ton'].idxmax()]
+        return row['Metric Ton'], row['Country'], row['Sub-commodity'], row['Year']
+
+    # Rows for a single year (Country, Sub-commodity, Year, Metric Ton)
+    def year_slice(self, year):
+        rows = self.year_slices.get(int(year))
+        if rows is None:
+            return pd.DataFrame(columns=['Country', 'Sub-commodity', 'Year', 'Metric Ton'])
+        return rows
+
+
+# Return the cube for one (mineral, flow) dataset, rebuilding it only when its
+# source file changed since it was last built
+def get_cube(mineral, flow):
+    data_path = statistics_datasets()[(mineral, flow)]
+    version = file_version(data_path)
+    cube = _cubes.get((mineral, flow))
+    if cube is not None and cube.version == version:
+        return cube
+
+    with _lock:
+        cube = _cubes.get((mineral, flow))
+        if cube is None or cube.version != version:
+            cube = DatasetCube(get_store().statistics_view(mineral, flow), version)
+            _cubes[(mineral, flow)] = cube
+        return cube
+
+
+# Build (or refresh) the cubes for all nine datasets, e.g. at startup.
+# Datasets whose files did not change are left untouched.
+def build_all_cubes():
+    return {key: get_cube(*key) for key in statistics_datasets()}
+
+
+# Build the cubes in a background thread, once per process, so the first
+# Mineral Statistics view finds them ready. Called from the landing page.
+def build_all_cubes_in_background():
+    global _warmup
+    if _warmup is not None:
+        return _warmup
+
+    def build():
+        try:
+            build_all_cubes()
+        except Exception:
+            # The page builds the cube again on demand and reports the error there
+            log_exception("Building the aggregate cubes at startup failed")
+
+    with _lock:
+        if _warmup is None:
+            _warmup = threading.Thread(target=build, name='build-cubes', daemon=True)
+            _warmup.start()
+        return _warmup
+
+
+# Parse the nine datasets into the Parquet cache and build their cubes, e.g.
+# after a deployment or a data update:
+#   python -m utils.aggregates
+if __name__ == '__main__':
+    started = time.perf_counter()
+    try:
+        cubes = build_all_cubes()
+    except (OSError, KeyError) as error:
+        sys.exit(f"Could not build the aggregate cubes: {error}")
+    print(f"{len(cubes)} cubes built in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from PIL import Image
+
+# Downloaded animations are kept here together with their ETag and fetch time
+CACHE_DIR = '.cache/lottie'
+
+REQUEST_TIMEOUT = 3  # seconds per request
+MAX_AGE = 24 * 60 * 60  # seconds before a cached animation is revalidated
+RETRY_AFTER = 5 * 60  # seconds before a failed download is retried
+
+# url -> (animation, time after which it should be revalidated)
+_animations = {}
+_refreshing = set()
+_lock = threading.Lock()
+_images = {}
+
+
+def _cache_paths(url):
+    name = hashlib.sha1(url.encode()).hexdigest()
+    return os.path.join(CACHE_DIR, f"{name}.json"), os.path.join(CACHE_DIR, f"{name}.meta.json")
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+# Download an animation, revalidating the cached copy with its ETag.
+# Returns the animation JSON, or None when the host could not be reached.
+def _fetch(url):
+    data_path, meta_path = _cache_paths(url)
+    meta = _read_json(meta_path) or {}
+    cached = _read_json(data_path)
+
+    headers = {}
+    if cached is not None and meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    try:
+        r = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        if r.status_code == 304 and cached is not None:
+            data = cached
+        elif r.status_code == 200:
+            data = r.json()
+            meta['etag'] = r.headers.get('ETag')
+        else:
+            return None
+    except (requests.RequestException, ValueError):
+        return None
+
+    try:
+        if data is not cached:
+            _write_json(data_path, data)
+        meta['fetched_at'] = time.time()
+        _write_json(meta_path, meta)
+    except OSError:
+        pass  # Read-only deployments keep the animation in memory only
+    return data
+
+
+def _refresh_in_background(url):
+    with _lock:
+        if url in _refreshing:
+            return
+        _refreshing.add(url)
+
+    def refresh():
+        try:
+            data = _fetch(url)
+            if data is not None:
+                _animations[url] = (data, time.time() + MAX_AGE)
+            else:
+                _animations[url] = (_animations[url][0], time.time() + RETRY_AFTER)
+        finally:
+            with _lock:
+                _refreshing.discard(url)
+
+    threading.Thread(target=refresh, daemon=True).start()
+
+
+# Load Lottie animations given as {name: url}.
+# Animations come from memory, then the on-disk cache, and are only downloaded
+# when no copy exists yet (concurrently, with a timeout). Stale copies are served
+# immediately and revalidated in the background. Animations that could not be
+# downloaded are None (and retried after RETRY_AFTER); show a static image instead.
+def load_lottie_animations(urls):
+    animations = {}
+    missing = []
+    now = time.time()
+    for name, url in urls.items():
+        entry = _animations.get(url)
+        if entry is None:
+            data_path, meta_path = _cache_paths(url)
+            data = _read_json(data_path)
+            if data is None:
+                missing.append(name)
+                continue
+            meta = _read_json(meta_path) or {}
+            entry = _animations[url] = (data, meta.get('fetched_at', 0) + MAX_AGE)
+        if now > entry[1]:
+            _refresh_in_background(url)
+        animations[name] = entry[0]
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+            fetched = pool.map(_fetch, [urls[name] for name in missing])
+            for name, data in zip(missing, fetched):
+                if data is None:
+                    _animations[urls[name]] = (None, now + RETRY_AFTER)
+                else:
+                    _animations[urls[name]] = (data, now + MAX_AGE)
+                animations[name] = data
+    return animations
+
+
+# Open and decode an image once per process (and again only if the file changes)
+def load_image(path):
+    mtime = os.stat(path).st_mtime_ns
+    cached = _images.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    image = Image.open(path)
+    image.load()
+    _images[path] = (mtime, image)
+    return image
@@ -0,0 +1,95 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import FLOWS, MINERALS, file_version, load_and_clean_data
+from utils.registry import statistics_datasets
+
+_store = None
+_lock = threading.Lock()
+
+
+def _categorical(values, categories=None):
+    return pd.Categorical(values, categories=categories)
+
+
+# All nine statistics datasets as one long table:
+#   mineral, flow, country, sub_commodity (categorical), year (int16), tonnes (float32)
+# Missing values are dropped. The table is shared by every session and must be
+# treated as read-only, as must the views returned by the methods below.
+class CommodityStore:
+    def __init__(self, frames, versions):
+        self.versions = versions
+        parts = []
+        for (mineral, flow), df in frames.items():
+            df = df.dropna(subset=['Metric Ton'])
+            parts.append(pd.DataFrame({
+                'mineral': mineral,
+                'flow': flow,
+                'country': df['Country'].astype(str).str.strip(),
+                'sub_commodity': df['Sub-commodity'].fillna('Total').astype(str).str.strip(),
+                'year': df['Year'].astype(int).to_numpy(dtype=np.int16),
+                'tonnes': df['Metric Ton'].to_numpy(dtype=np.float32),
+            }))
+        table = pd.concat(parts, ignore_index=True)
+        table['mineral'] = _categorical(table['mineral'], MINERALS)
+        table['flow'] = _categorical(table['flow'], FLOWS)
+        table['country'] = _categorical(table['country'])
+        table['sub_commodity'] = _categorical(table['sub_commodity'])
+        self.table = table
+        self._views = {}
+
+    # Rows matching every given dimension; each filter takes a single value or a list
+    def query(self, mineral=None, flow=None, country=None, sub_commodity=None, years=None):
+        mask = np.ones(len(self.table), dtype=bool)
+        for column, value in (('mineral', mineral), ('flow', flow), ('country', country), ('sub_commodity', sub_commodity)):
+            if value is None:
+                continue
+            if isinstance(value, str):
+                mask &= (self.table[column] == value).to_numpy()
+            else:
+                mask &= self.table[column].isin(value).to_numpy()
+        if years is not None:
+            first, last = years
+            year = self.table['year'].to_numpy()
+            mask &= (year >= first) & (year <= last)
+        return self.table[mask]
+
+    # One dataset in the layout used by the statistics pages
+    # (Country, Sub-commodity, Year, Metric Ton), built once per store. Country and
+    # Sub-commodity stay categorical, limited to the values of this dataset.
+    def statistics_view(self, mineral, flow):
+        view = self._views.get((mineral, flow))
+        if view is None:
+            rows = self.query(mineral=mineral, flow=flow)
+            view = pd.DataFrame({
+                'Country': rows['country'].cat.remove_unused_categories().array,
+                'Sub-commodity': rows['sub_commodity'].cat.remove_unused_categories().array,
+                'Year': rows['year'].to_numpy(),
+                'Metric Ton': rows['tonnes'].to_numpy(),
+            })
+            self._views[(mineral, flow)] = view
+        return view
+
+    def memory_usage(self):
+        return int(self.table.memory_usage(deep=True).sum())
+
+
+# The shared store, rebuilt when any of the statistics datasets changed, e.g.
+# after an upload replaced one of them (see utils/registry.py). Unchanged files
+# come from the Parquet cache in utils/data_loader.py and are released once
+# they are in the store.
+def get_store():
+    global _store
+    paths = statistics_datasets()
+    versions = {key: file_version(path) for key, path in paths.items()}
+    store = _store
+    if store is not None and store.versions == versions:
+        return store
+
+    with _lock:
+        if _store is None or _store.versions != versions:
+            frames = {key: load_and_clean_data(paths[key]) for key in versions}
+            _store = CommodityStore(frames, versions)
+        return _store
@@ -0,0 +1,70 @@
+import threading
+
+import pandas as pd
+
+from utils.data_loader import file_version, load_mining_areas
+from utils.registry import dataset_path
+
+# The mining area table pairs each country name with its ISO3 code
+COUNTRY_CODES_DATASET = 'Global Mining Areas'
+
+# Names used by the statistics datasets that are spelled differently in the mining area table
+COUNTRY_ALIASES = {
+    'USA': 'United States',
+    'United States of America': 'United States',
+    'Russia': 'Russian Federation',
+    'Korea (Rep. of)': 'South Korea',
+    'Korea, Republic of': 'South Korea',
+    'Ireland, Republic of': 'Ireland',
+    'Czech Republic': 'Czechia',
+    'Viet Nam': 'Vietnam',
+    'Türkiye': 'Turkey',
+}
+
+# Countries that report trade statistics but have no entry in the mining area table
+EXTRA_CODES = {
+    'Croatia': 'HRV',
+    'Denmark': 'DNK',
+    'Estonia': 'EST',
+    'Gambia': 'GMB',
+    'Latvia': 'LVA',
+    'Lithuania': 'LTU',
+    'Malta': 'MLT',
+}
+
+_lookup = None
+_lock = threading.Lock()
+
+
+def _build_lookup(data_path):
+    table = load_mining_areas(data_path)
+    codes = dict(zip(table['COUNTRY_NAME'].str.strip(), table['ISO3_CODE'].str.strip()))
+    codes.update(EXTRA_CODES)
+    for alias, name in COUNTRY_ALIASES.items():
+        if name in codes:
+            codes[alias] = codes[name]
+    return codes
+
+
+# Country name -> ISO3 code, built once per version of the mining area table
+def iso3_lookup():
+    global _lookup
+    data_path = dataset_path(COUNTRY_CODES_DATASET)
+    version = file_version(data_path)
+    if _lookup is not None and _lookup[0] == version:
+        return _lookup[1]
+
+    with _lock:
+        if _lookup is None or _lookup[0] != version:
+            _lookup = (version, _build_lookup(data_path))
+        return _lookup[1]
+
+
+def iso3_version():
+    return file_version(dataset_path(COUNTRY_CODES_DATASET))
+
+
+# ISO3 codes for a column of country names; unknown names map to NaN
+def to_iso3(names):
+    names = pd.Series(names)
+    return names.astype(str).str.strip().map(iso3_lookup())
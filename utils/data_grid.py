@@ -0,0 +1,168 @@
+import glob
+import hashlib
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from utils.instrumentation import span
+
+EXPORT_DIR = '.cache/exports'
+# Rows converted per chunk when writing a download file
+EXPORT_CHUNK_ROWS = 50_000
+# Download files older than this are removed when a new one is written
+EXPORT_MAX_AGE = 60 * 60
+
+PAGE_SIZES = [25, 50, 100, 250]
+NO_SORT = '(none)'
+
+
+# Positions of the rows that contain search (case-insensitive) in any of the text columns
+def search_rows(df, columns, search):
+    mask = np.zeros(len(df), dtype=bool)
+    for column in columns:
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values):
+            continue
+        mask |= values.astype(str).str.contains(search, case=False, regex=False, na=False).to_numpy()
+    return np.flatnonzero(mask)
+
+
+# Row positions of df after search and sort. Missing values sort last.
+def row_order(df, columns, search='', sort_column=None, descending=False):
+    positions = np.arange(len(df))
+    if search:
+        positions = search_rows(df, columns, search)
+    if sort_column is not None:
+        values = df[sort_column].iloc[positions].reset_index(drop=True)
+        order = values.sort_values(ascending=not descending, kind='stable', na_position='last').index.to_numpy()
+        positions = positions[order]
+    return positions
+
+
+# Rows of df in the given order, a chunk at a time, limited to columns
+def iter_chunks(df, positions, columns, chunk_rows=EXPORT_CHUNK_ROWS):
+    for start in range(0, len(positions), chunk_rows):
+        yield df.iloc[positions[start:start + chunk_rows]][columns]
+
+
+def _remove_old_exports(max_age=EXPORT_MAX_AGE):
+    cutoff = time.time() - max_age
+    for path in glob.glob(os.path.join(EXPORT_DIR, '*')):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass  # Removed by another session in the meantime
+
+
+# Write the selected rows to a CSV or Parquet file chunk by chunk, so the whole
+# selection is never serialized in memory at once. Returns the file path.
+def write_export(df, positions, columns, file_format):
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    _remove_old_exports()
+    suffix = '.parquet' if file_format == 'Parquet' else '.csv'
+    handle, path = tempfile.mkstemp(suffix=suffix, dir=EXPORT_DIR)
+    os.close(handle)
+
+    if file_format == 'Parquet':
+        # Schema of the whole selection, so chunks with only missing values still match
+        schema = pa.Schema.from_pandas(df[columns], preserve_index=False)
+        with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+            for chunk in iter_chunks(df, positions, columns):
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    else:
+        with open(path, 'w', newline='', encoding='utf-8') as out:
+            df[columns].iloc[:0].to_csv(out, index=False)
+            for chunk in iter_chunks(df, positions, columns):
+                chunk.to_csv(out, header=False, index=False)
+    return path
+
+
+# Server-side paginated table. Search, sorting and column selection are applied
+# here and only the visible page of rows is sent to the browser. The full
+# selection can be downloaded as CSV or Parquet, built only when requested.
+# columns are the ones shown by default; all columns of df can be picked.
+# version identifies the data behind df (e.g. the dataset version) and selection
+# the rows of it that df holds, in order (e.g. the filter values), so cached row
+# positions are only reused for the same rows. Without a selection an ordered
+# hash of df.index is used, which costs a pass over the index on every run.
+def data_grid(df, key, columns=None, page_size=25, file_name='data', version=None, selection=None):
+    all_columns = list(df.columns)
+    default_columns = all_columns if columns is None else [c for c in columns if c in all_columns]
+
+    with st.container(border=True):
+        search_column, sort_column_input, direction_column = st.columns([2, 2, 1])
+        with search_column:
+            search = st.text_input('Search', key=f'{key}_search').strip()
+        with sort_column_input:
+            sort_column = st.selectbox('Sort by', [NO_SORT] + all_columns, key=f'{key}_sort')
+        with direction_column:
+            descending = st.toggle('Descending', key=f'{key}_descending')
+        shown_columns = st.multiselect('Columns', all_columns, default=default_columns, key=f'{key}_columns')
+        shown_columns = [c for c in all_columns if c in shown_columns] or default_columns
+
+        with span('grid: order'):
+            sort_key = None if sort_column == NO_SORT else sort_column
+            if selection is None:
+                selection = hashlib.blake2b(pd.util.hash_pandas_object(df.index).to_numpy().tobytes(),
+                                            digest_size=16).hexdigest()
+            signature = (version, selection, search, sort_key, descending, tuple(shown_columns), len(df))
+            cached = st.session_state.get(f'{key}_order')
+            if cached is not None and cached[0] == signature:
+                positions = cached[1]
+            else:
+                positions = row_order(df, shown_columns, search, sort_key, descending)
+                st.session_state[f'{key}_order'] = (signature, positions)
+
+        # Page navigation; the page number is clamped when the selection shrinks
+        size = st.session_state.get(f'{key}_page_size', page_size)
+        page_count = max(1, -(-len(positions) // size))
+        if st.session_state.get(f'{key}_page', 1) > page_count:
+            st.session_state[f'{key}_page'] = page_count
+
+        with span('grid: page'):
+            page = st.session_state.get(f'{key}_page', 1)
+            start = (page - 1) * size
+            page_rows = df.iloc[positions[start:start + size]][shown_columns]
+            st.dataframe(page_rows, hide_index=True, use_container_width=True)
+
+        page_column, size_column, count_column = st.columns([1, 1, 2])
+        with page_column:
+            st.number_input('Page', min_value=1, max_value=page_count, step=1, key=f'{key}_page')
+        with size_column:
+            st.selectbox('Rows per page', PAGE_SIZES, index=PAGE_SIZES.index(page_size) if page_size in PAGE_SIZES else 0,
+                         key=f'{key}_page_size')
+        with count_column:
+            if len(positions):
+                st.caption(f"Rows {start + 1:,}–{min(start + size, len(positions)):,} of {len(positions):,}")
+            else:
+                st.caption("No rows match the selection.")
+
+        # Download of the full selection. The file is written only when asked
+        # for and kept for this session until the selection changes.
+        format_column, button_column = st.columns([1, 3])
+        with format_column:
+            file_format = st.radio('Format', ['CSV', 'Parquet'], horizontal=True, key=f'{key}_format')
+        export_signature = signature + (file_format,)
+        export = st.session_state.get(f'{key}_export')
+        ready = export is not None and export[0] == export_signature and os.path.exists(export[1])
+        with button_column:
+            if not ready and st.button(f'Prepare download ({len(positions):,} rows)', key=f'{key}_prepare'):
+                with st.spinner('Writing file...'), span('grid: export'):
+                    path = write_export(df, positions, shown_columns, file_format)
+                if export is not None and os.path.exists(export[1]):
+                    os.remove(export[1])
+                export = (export_signature, path)
+                st.session_state[f'{key}_export'] = export
+                ready = True
+            if ready:
+                with open(export[1], 'rb') as export_file:
+                    st.download_button(f'Download {len(positions):,} rows', export_file,
+                                       file_name=f'{file_name}{os.path.splitext(export[1])[1]}',
+                                       key=f'{key}_download')
@@ -0,0 +1,179 @@
+import hashlib
+import os
+import threading
+
+import pandas as pd
+
+# Directory for the on-disk columnar cache of parsed datasets
+CACHE_DIR = '.cache/datasets'
+
+MINERALS = ["Titanium", "Zirconium", "Rare Earth"]
+FLOWS = ["Export", "Import", "Production"]
+
+# File paths for all statistics, keyed by (mineral, flow)
+STATISTICS_DATASETS = {
+    ("Titanium", "Export"): 'data/Titanium Export Statistics.csv',
+    ("Titanium", "Import"): 'data/Titanium Import Statistics.csv',
+    ("Titanium", "Production"): 'data/Titanium Production Statistics.csv',
+    ("Zirconium", "Export"): 'data/Zirconium Export Statistics.csv',
+    ("Zirconium", "Import"): 'data/Zirconium Import Statistics.csv',
+    ("Zirconium", "Production"): 'data/Zirconium Production Statistics.csv',
+    ("Rare Earth", "Export"): 'data/Rare_Earth_Export_Statistics.csv',
+    ("Rare Earth", "Import"): 'data/Rare_Earth_Import_Statistics.csv',
+    ("Rare Earth", "Production"): 'data/Rare_Earth_Production_Statistics.csv',
+}
+
+# In-process cache: path -> (version, melted DataFrame)
+_frames = {}
+_lock = threading.Lock()
+
+# Content hashes: path -> ((mtime, size), hash)
+_hashes = {}
+_hash_lock = threading.Lock()
+
+
+def _content_hash(data_path):
+    digest = hashlib.sha256()
+    with open(data_path, 'rb') as source:
+        for block in iter(lambda: source.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+# Version of a source file: a hash of its content. Every cache keys on it, so a
+# rewritten file is picked up by all sessions while a file that is touched or
+# uploaded again unchanged keeps its version and nothing is re-derived. The
+# file is only hashed again when its mtime or size changes.
+def file_version(data_path):
+    stat = os.stat(data_path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _hashes.get(data_path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    with _hash_lock:
+        cached = _hashes.get(data_path)
+        if cached is None or cached[0] != key:
+            cached = (key, _content_hash(data_path))
+            _hashes[data_path] = cached
+        return cached[1]
+
+
+def _cache_name(data_path):
+    return os.path.splitext(os.path.basename(data_path))[0].replace(' ', '_')
+
+
+def _cache_path(data_path, version):
+    return os.path.join(CACHE_DIR, f"{_cache_name(data_path)}-{version}.parquet")
+
+
+# Cached Parquet files derived from data_path, e.g. to list or remove them
+def cache_artifacts(data_path):
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    prefix = f"{_cache_name(data_path)}-"
+    return sorted(os.path.join(CACHE_DIR, name) for name in os.listdir(CACHE_DIR) if name.startswith(prefix))
+
+
+# Read a CSV file, or a Parquet file such as an upload written by the admin panel
+def read_table(data_path):
+    if data_path.endswith('.parquet'):
+        return pd.read_parquet(data_path)
+    return pd.read_csv(data_path)
+
+
+# Parse a statistics table into long form (Country, Sub-commodity, Year, Metric Ton)
+def parse_statistics_csv(data_path):
+    df = read_table(data_path)
+    df.columns = df.columns.str.strip()  # Clean column names by stripping whitespace
+    if 'Sub-commodity' not in df.columns:  # Zirconium Production only has country totals
+        df.insert(1, 'Sub-commodity', 'Total')
+    year_columns = [column for column in df.columns if column not in ('Country', 'Sub-commodity')]
+    df_cleaned = df.dropna(subset=year_columns, how='all')  # Clean rows with NaN values
+    df_melted = df_cleaned.melt(id_vars=['Country', 'Sub-commodity'], var_name='Year', value_name='Metric Ton')
+    return df_melted
+
+
+# Remove cached Parquet files left behind by older versions of a dataset
+def _remove_stale(data_path, keep):
+    prefix = f"{_cache_name(data_path)}-"
+    if not os.path.isdir(CACHE_DIR):
+        return
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        if name.startswith(prefix) and path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _load_from_disk(data_path, version, parse):
+    cache_path = _cache_path(data_path, version)
+    if os.path.exists(cache_path):
+        try:
+            return pd.read_parquet(cache_path)
+        except Exception:
+            pass  # Corrupt or unreadable cache file, rebuild it below
+
+    df = parse(data_path)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, cache_path)
+        _remove_stale(data_path, cache_path)
+    except Exception:
+        pass  # Read-only deployments still work without the disk cache
+    return df
+
+
+# Return the parsed frame for data_path, parsing it at most once per file version.
+# With keep_in_memory=False the frame comes from the Parquet cache on disk but is
+# not held by this process, for callers that keep a compact copy of their own.
+def cached_load(data_path, parse, keep_in_memory=True):
+    version = file_version(data_path)
+    cached = _frames.get(data_path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    if not keep_in_memory:
+        return _load_from_disk(data_path, version, parse)
+
+    with _lock:
+        cached = _frames.get(data_path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        df = _load_from_disk(data_path, version, parse)
+        _frames[data_path] = (version, df)
+        return df
+
+
+# Load a statistics dataset in melted long form.
+# Each file is parsed once and kept as Parquet on disk; the cache is invalidated
+# automatically when the file's content hash changes. The melted frame is not
+# kept in memory: the pages read the datasets from the categorical table in
+# utils/commodity_store.py, which is built from these frames.
+def load_and_clean_data(data_path):
+    return cached_load(data_path, parse_statistics_csv, keep_in_memory=False)
+
+
+# Load the mining deposits table, cached the same way as the statistics datasets
+def load_deposits(data_path):
+    return cached_load(data_path, read_table)
+
+
+# Load the Vietnam statistical yearbook table (one row per year, one column per mineral)
+def load_yearbook(data_path):
+    return cached_load(data_path, read_table)
+
+
+# Load the per-country mining area table with whitespace stripped from the column names
+def load_mining_areas(data_path):
+    return cached_load(data_path, _parse_mining_areas)
+
+
+def _parse_mining_areas(data_path):
+    df = read_table(data_path)
+    df.columns = df.columns.str.strip()
+    return df
+
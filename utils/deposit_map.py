@@ -0,0 +1,102 @@
+import json
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from folium.plugins import MarkerCluster
+from folium.template import Template
+
+# Columns shipped to the browser for each deposit, in payload order
+POPUP_FIELDS = ['DEPOSIT_NA', 'LOCATION', 'LOC_DETAIL', 'CRITICAL_M', 'DEPOSIT_TY']
+
+# Number of filter combinations whose marker payload is kept in memory
+MAX_CACHED_LAYERS = 64
+
+_layers = OrderedDict()
+_lock = threading.Lock()
+
+
+# Marker cluster that receives all deposits as one columnar JSON payload.
+# Markers and their popups are created in the browser, so the server never
+# builds a Python object per row.
+class DepositCluster(MarkerCluster):
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var data = {{ this.payload }};
+                var cluster = L.markerClusterGroup({{ this.options|tojavascript }});
+                var icon = L.AwesomeMarkers.icon({icon: 'info-sign', markerColor: 'blue', prefix: 'glyphicon'});
+                var field = function (name, i) {
+                    return data[name].values[data[name].codes[i]];
+                };
+                var escape = function (value) {
+                    return String(value).replace(/[&<>"']/g, function (c) {
+                        return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+                    });
+                };
+                var markers = [];
+
+                for (var i = 0; i < data.lat.length; i++) {
+                    var marker = L.marker([data.lat[i], data.lon[i]], {icon: icon});
+                    marker.bindPopup((function (i) {
+                        return function () {
+                            return '<b>Deposit Name:</b> ' + escape(field('DEPOSIT_NA', i)) + '<br>' +
+                                '<b>Location:</b> ' + escape(field('LOCATION', i)) + ' - ' + escape(field('LOC_DETAIL', i)) + '<br>' +
+                                '<b>Critical Minerals:</b> ' + escape(field('CRITICAL_M', i)) + '<br>' +
+                                '<b>Deposit Type:</b> ' + escape(field('DEPOSIT_TY', i));
+                        };
+                    })(i));
+                    markers.push(marker);
+                }
+
+                cluster.addLayers(markers);
+                cluster.addTo({{ this._parent.get_name() }});
+                return cluster;
+            })();
+        {% endmacro %}"""
+    )
+
+    def __init__(self, payload, **kwargs):
+        kwargs.setdefault('chunkedLoading', True)
+        super().__init__(**kwargs)
+        self._name = 'DepositCluster'
+        self.payload = payload
+
+
+# Serialise the deposit columns needed by the map into one JSON object of arrays.
+# Text columns are dictionary encoded (distinct values plus integer codes) since
+# locations, minerals and deposit types repeat across thousands of rows.
+def build_layer_payload(df):
+    df = df.dropna(subset=['LATITUDE', 'LONGITUDE'])
+    columns = {
+        'lat': df['LATITUDE'].astype(float).round(5).tolist(),
+        'lon': df['LONGITUDE'].astype(float).round(5).tolist(),
+    }
+    for field in POPUP_FIELDS:
+        codes, values = pd.factorize(df[field].fillna('').astype(str))
+        columns[field] = {'values': values.tolist(), 'codes': codes.tolist()}
+    # Keep the payload safe to embed inside a <script> block
+    return json.dumps(columns, separators=(',', ':')).replace('</', '<\\/')
+
+
+# Return the marker payload for a filter combination, building it on first use.
+# key must identify both the dataset version and the filter selection.
+def get_layer_payload(key, df):
+    with _lock:
+        payload = _layers.get(key)
+        if payload is not None:
+            _layers.move_to_end(key)
+            return payload
+
+    payload = build_layer_payload(df)
+    with _lock:
+        _layers[key] = payload
+        while len(_layers) > MAX_CACHED_LAYERS:
+            _layers.popitem(last=False)
+    return payload
+
+
+# Build the deposit cluster layer for the filtered deposits
+def deposit_layer(key, df, **kwargs):
+    return DepositCluster(get_layer_payload(key, df), **kwargs)
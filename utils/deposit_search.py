@@ -0,0 +1,170 @@
+import re
+import threading
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import file_version, load_deposits
+
+# Columns searched by the free text query
+SEARCH_COLUMNS = ['DEPOSIT_NA', 'LOCATION', 'LOC_DETAIL', 'CRITICAL_M', 'DEPOSIT_TY']
+# Columns offered as filters, each with a precomputed row bitmap per value
+FACET_COLUMNS = ['LOCATION', 'CRITICAL_M', 'DEPOSIT_TY']
+
+# Score of a query token matching a row exactly, by prefix or with one typo
+EXACT, PREFIX, FUZZY = 3, 2, 1
+# Shortest query token that is matched with a typo
+MIN_FUZZY_LENGTH = 4
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+# Lower-case words without accents, e.g. "Bình Thuận" -> ['binh', 'thuan']
+def tokenize(text):
+    if not isinstance(text, str):
+        return []
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+    return re.findall(r'[a-z0-9]+', text)
+
+
+# Variants of a token with one character removed, used to find typo matches
+def _deletes(token):
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+# True when a and b differ by at most one insertion, deletion or substitution
+def within_one_edit(a, b):
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    for i, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return a[i + 1:] == b[i + 1:] if len(a) == len(b) else a[i:] == b[i + 1:]
+    return True
+
+
+# Search structures over the deposits table, built once per file version:
+# - an inverted index from every word in SEARCH_COLUMNS to the rows containing
+#   it, with a sorted vocabulary for prefix lookups and a one-deletion
+#   neighbourhood for typo-tolerant lookups
+# - a packed bitmap of rows per value of each FACET_COLUMNS column, so combined
+#   filters are bitwise ANDs instead of scans over the string columns
+# Results are row positions into the table (use them with DataFrame.iloc).
+class DepositSearchIndex:
+    def __init__(self, df, version=None):
+        self.version = version
+        self.n_rows = len(df)
+
+        postings = {}
+        for column in SEARCH_COLUMNS:
+            codes, values = pd.factorize(df[column])
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(values) + 1))
+            for code, value in enumerate(values):
+                rows = order[bounds[code]:bounds[code + 1]]
+                for token in set(tokenize(value)):
+                    postings.setdefault(token, []).append(rows)
+        self.vocabulary = np.array(sorted(postings), dtype=object)
+        self._postings = {token: np.unique(np.concatenate(rows)) for token, rows in postings.items()}
+
+        self._neighbours = {}
+        for token in self.vocabulary:
+            if len(token) >= MIN_FUZZY_LENGTH - 1:
+                for variant in _deletes(token) | {token}:
+                    self._neighbours.setdefault(variant, []).append(token)
+
+        self._facets = {}
+        self._facet_options = {}
+        for column in FACET_COLUMNS:
+            codes, values = pd.factorize(df[column])
+            self._facets[column] = {value: np.packbits(codes == code) for code, value in enumerate(values)}
+            self._facet_options[column] = sorted(values.tolist())
+
+    # Sorted values of a facet column, for filter widgets
+    def facet_options(self, column):
+        return self._facet_options[column]
+
+    # Packed bitmap of the rows matching all filters; each filter is a column and
+    # a value or list of values (an empty list or None leaves the column unfiltered)
+    def facet_bits(self, **filters):
+        bits = np.packbits(np.ones(self.n_rows, dtype=bool))
+        for column, values in filters.items():
+            if values is None or (isinstance(values, (list, tuple, set)) and not values):
+                continue
+            if isinstance(values, str):
+                values = [values]
+            column_bits = np.zeros_like(bits)
+            for value in values:
+                value_bits = self._facets[column].get(value)
+                if value_bits is not None:
+                    column_bits |= value_bits
+            bits &= column_bits
+        return bits
+
+    # Boolean row mask of the rows matching all filters
+    def facet_mask(self, **filters):
+        return np.unpackbits(self.facet_bits(**filters), count=self.n_rows).astype(bool)
+
+    # Vocabulary words starting with prefix
+    def prefix_tokens(self, prefix):
+        start = np.searchsorted(self.vocabulary, prefix, side='left')
+        end = np.searchsorted(self.vocabulary, prefix + '\uffff', side='left')
+        return self.vocabulary[start:end]
+
+    # Vocabulary words within one edit of token
+    def fuzzy_tokens(self, token):
+        if len(token) < MIN_FUZZY_LENGTH:
+            return []
+        candidates = set()
+        for variant in _deletes(token) | {token}:
+            candidates.update(self._neighbours.get(variant, ()))
+        return [candidate for candidate in candidates if candidate != token and within_one_edit(token, candidate)]
+
+    # Per-row score of one query token: exact word, word prefix or a word one typo away
+    def _token_scores(self, token):
+        scores = np.zeros(self.n_rows, dtype=np.int8)
+        for match in self.fuzzy_tokens(token):
+            scores[self._postings[match]] = FUZZY
+        for match in self.prefix_tokens(token):
+            scores[self._postings[match]] = PREFIX
+        exact = self._postings.get(token)
+        if exact is not None:
+            scores[exact] = EXACT
+        return scores
+
+    # Row positions matching every word of query, best matches first. mask
+    # optionally restricts the result to a boolean row mask (e.g. facet_mask).
+    def search(self, query, mask=None, limit=None):
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            positions = np.arange(self.n_rows) if mask is None else np.flatnonzero(mask)
+            return positions[:limit]
+
+        total = np.zeros(self.n_rows, dtype=np.int16)
+        matched = np.ones(self.n_rows, dtype=bool) if mask is None else np.asarray(mask, dtype=bool).copy()
+        for token in tokens:
+            scores = self._token_scores(token)
+            matched &= scores > 0
+            total += scores
+        positions = np.flatnonzero(matched)
+        order = np.argsort(-total[positions], kind='stable')
+        return positions[order][:limit]
+
+
+# Search index over the deposits file, built once per file version
+def deposit_search_index(data_path):
+    version = file_version(data_path)
+    cached = _indexes.get(data_path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with _lock:
+        cached = _indexes.get(data_path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        index = DepositSearchIndex(load_deposits(data_path), version)
+        _indexes[data_path] = (version, index)
+        return index
@@ -0,0 +1,91 @@
+import json
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from utils.instrumentation import span
+
+# Upper bound for the serialized figures kept in memory by the shared cache
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+
+# Turn a filter value into something hashable and order independent,
+# so ['Vietnam', 'China'] and ['China', 'Vietnam'] share a cache entry
+def _normalize(value):
+    if isinstance(value, (list, tuple, set, frozenset)) or hasattr(value, 'tolist'):
+        values = value.tolist() if hasattr(value, 'tolist') else value
+        if not isinstance(values, list):
+            return values
+        return tuple(sorted((_normalize(v) for v in values), key=repr))
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize(v)) for k, v in value.items()))
+    return value
+
+
+def figure_key(kind, version, **selection):
+    return (version, kind, _normalize(selection))
+
+
+# LRU cache of Plotly figures stored as serialized JSON.
+# Entries are evicted oldest first once their total size exceeds max_bytes.
+class FigureCache:
+    def __init__(self, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            spec = self._entries.get(key)
+            if spec is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return spec
+
+    def put(self, key, spec):
+        size = len(spec)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = spec
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    # Return the figure for key, calling build() to create it on a miss
+    def get_or_build(self, key, build):
+        spec = self.get(key)
+        if spec is None:
+            spec = pio.to_json(build(), validate=False)
+            self.put(key, spec)
+        # The JSON was produced from a valid figure, so skip Plotly's validation
+        return go.Figure(json.loads(spec), _validate=False)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+# Process-wide cache shared by all sessions
+figure_cache = FigureCache()
+
+
+# Build a figure once per (dataset version, chart kind, filter selection)
+def cached_figure(kind, version, build, **selection):
+    with span(f"figure: {kind}"):
+        return figure_cache.get_or_build(figure_key(kind, version, **selection), build)
@@ -0,0 +1,112 @@
+import os
+import re
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Rows parsed and validated at a time, bounds memory use for large uploads
+CHUNK_SIZE = 50_000
+
+DATASETS_DIR = 'datasets'
+
+ID_COLUMNS = ['Country', 'Sub-commodity']
+YEAR_PATTERN = re.compile(r'^\d{4}$')
+
+
+class IngestError(ValueError):
+    pass
+
+
+# Dataset names become file names, so only allow a safe subset of characters
+def dataset_file_name(dataset_name):
+    name = re.sub(r'[^A-Za-z0-9 _-]+', '', dataset_name).strip().replace(' ', '_')
+    if not name:
+        raise IngestError("Enter a dataset name using letters, digits, spaces, '-' or '_'.")
+    return f"{name}.parquet"
+
+
+# Check the header against the layout the statistics pages expect:
+# Country, an optional Sub-commodity column and one column per year
+def validate_columns(columns):
+    if 'Country' not in columns:
+        raise IngestError("Missing required column 'Country'.")
+    year_columns = [column for column in columns if YEAR_PATTERN.match(column)]
+    if not year_columns:
+        raise IngestError("No year columns found (expected headers such as '2012', '2013', ...).")
+    unexpected = [column for column in columns if column not in ID_COLUMNS and column not in year_columns]
+    if unexpected:
+        raise IngestError(f"Unexpected columns: {', '.join(unexpected)}.")
+    return year_columns
+
+
+# Normalise one chunk: trimmed text dimensions, year values already parsed as floats
+def normalize_chunk(chunk, year_columns, first_row):
+    chunk.columns = chunk.columns.str.strip()
+    if 'Sub-commodity' not in chunk.columns:
+        chunk.insert(1, 'Sub-commodity', 'Total')
+
+    out = pd.DataFrame({
+        'Country': chunk['Country'].str.strip(),
+        'Sub-commodity': chunk['Sub-commodity'].str.strip(),
+    })
+    missing = (out['Country'].isna() | (out['Country'] == '')).to_numpy()
+    if missing.any():
+        raise IngestError(f"Row {first_row + int(missing.argmax()) + 1}: 'Country' is empty.")
+
+    for column in year_columns:
+        out[column] = chunk[column]
+    return out
+
+
+# Stream a CSV upload into a Parquet file.
+# The source is read in chunks of CHUNK_SIZE rows, each chunk is validated and
+# normalised, and the result is written to a temporary file that replaces
+# dest_path only once every chunk succeeded. progress(fraction) is called after
+# each chunk when given. Returns the number of rows written.
+def ingest_csv(source, dest_path, progress=None, chunk_size=CHUNK_SIZE):
+    total_bytes = getattr(source, 'size', None)
+    tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(dest_path) or '.', exist_ok=True)
+
+    writer = None
+    rows = 0
+    try:
+        # Read the header first so year columns are parsed as numbers by the CSV reader itself
+        header = pd.read_csv(source, nrows=0, encoding='utf-8-sig').columns
+        source.seek(0)
+        year_columns = validate_columns(list(header.str.strip()))
+        dtypes = {raw: ('float64' if raw.strip() in year_columns else 'string') for raw in header}
+        schema = pa.schema(
+            [pa.field(column, pa.string()) for column in ID_COLUMNS]
+            + [pa.field(column, pa.float64()) for column in year_columns]
+        )
+        writer = pq.ParquetWriter(tmp_path, schema, compression='zstd')
+
+        reader = pd.read_csv(source, dtype=dtypes, thousands=',', chunksize=chunk_size, encoding='utf-8-sig')
+        for chunk in reader:
+            table = normalize_chunk(chunk, year_columns, rows)
+            writer.write_table(pa.Table.from_pandas(table, schema=schema, preserve_index=False))
+            rows += len(table)
+
+            if progress is not None and total_bytes:
+                progress(min(source.tell() / total_bytes, 1.0))
+
+        writer.close()
+        writer = None
+        os.replace(tmp_path, dest_path)
+    except pd.errors.EmptyDataError as error:
+        raise IngestError("The uploaded file is empty.") from error
+    except (pd.errors.ParserError, ValueError) as error:
+        if isinstance(error, IngestError):
+            raise
+        raise IngestError(f"Could not parse CSV, check that year columns only contain numbers ({error}).") from error
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    if progress is not None:
+        progress(1.0)
+    return rows
@@ -0,0 +1,170 @@
+import contextlib
+import functools
+import glob
+import json
+import logging
+import os
+import sys
+import time
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Profiling is enabled for every session with RENO_TITAN_PROFILE=1, or for a
+# single session by opening a page with ?profile=1
+PROFILE_ENV = os.environ.get('RENO_TITAN_PROFILE') == '1'
+PROFILE_DIR = os.environ.get('RENO_TITAN_PROFILE_DIR', '.cache/profiles')
+
+_RUN_KEY = '_profile_run'
+_COUNT_KEY = '_profile_run_count'
+
+_logger = logging.getLogger('reno_titan')
+
+
+def profiling_enabled():
+    return PROFILE_ENV or st.query_params.get('profile') == '1'
+
+
+def _current_run():
+    try:
+        return st.session_state.get(_RUN_KEY)
+    except Exception:
+        return None  # Not running inside a Streamlit session (e.g. plain Python)
+
+
+def _new_run(page, interaction):
+    runs = st.session_state.get(_COUNT_KEY, {})
+    runs[page] = runs.get(page, 0) + 1
+    st.session_state[_COUNT_KEY] = runs
+    if interaction is None:
+        interaction = 'first run' if runs[page] == 1 else 'rerun'
+    run = {'page': page, 'interaction': interaction, 'start': time.perf_counter(), 'spans': []}
+    st.session_state[_RUN_KEY] = run
+    return run
+
+
+# Log the exception being handled with its traceback, for failures outside a
+# page run (e.g. background work) that would otherwise go unnoticed
+def log_exception(message):
+    _logger.exception(message)
+
+
+# Start timing a full script run of a page; call at the top of the page
+def start_run(page):
+    if not profiling_enabled():
+        st.session_state.pop(_RUN_KEY, None)
+        return
+    _new_run(page, None)
+
+
+# Time a named section of the current run. Costs one session_state lookup when
+# profiling is disabled.
+@contextlib.contextmanager
+def span(name):
+    run = _current_run()
+    if run is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        run['spans'].append((name, (time.perf_counter() - start) * 1000))
+
+
+def _span_totals(run):
+    totals = {}
+    for name, duration in run['spans']:
+        totals[name] = totals.get(name, 0.0) + duration
+    return totals
+
+
+# Append the run as one JSON line to this session's profile file
+def _write_record(run, total_ms):
+    ctx = get_script_run_ctx(suppress_warning=True)
+    session_id = ctx.session_id if ctx is not None else 'local'
+    record = {
+        'timestamp': time.time(),
+        'session': session_id,
+        'page': run['page'],
+        'interaction': run['interaction'],
+        'total_ms': round(total_ms, 2),
+        'spans': {name: round(duration, 2) for name, duration in _span_totals(run).items()},
+    }
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(os.path.join(PROFILE_DIR, f"{session_id}.jsonl"), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+    except OSError:
+        pass
+
+
+# Finish the run started by start_run: log it and show the breakdown in the sidebar
+def finish_run():
+    run = _current_run()
+    if run is None:
+        return
+    total_ms = (time.perf_counter() - run['start']) * 1000
+    _write_record(run, total_ms)
+
+    with st.sidebar.expander("Profile of this run", expanded=True):
+        st.caption(f"{run['page']} - {run['interaction']} - total {total_ms:.1f} ms")
+        rows = [{'Span': name, 'ms': round(duration, 1)} for name, duration in _span_totals(run).items()]
+        if rows:
+            st.dataframe(rows, hide_index=True)
+
+
+# st.fragment that is also profiled. On a fragment-only rerun the fragment is
+# logged as its own run (interaction = name); during a full run it is a span.
+def profiled_fragment(name):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            ctx = get_script_run_ctx(suppress_warning=True)
+            run = _current_run()
+            if run is None or not (ctx is not None and ctx.fragment_ids_this_run):
+                with span(name):
+                    return func(*args, **kwargs)
+
+            fragment_run = _new_run(run['page'], name)
+            try:
+                with span(name):
+                    return func(*args, **kwargs)
+            finally:
+                _write_record(fragment_run, (time.perf_counter() - fragment_run['start']) * 1000)
+        return st.fragment(wrapper)
+    return decorate
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    index = min(int(round(q * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+# p50/p95 of total and per-span times, per page and interaction, over all logged sessions
+def summarize(profile_dir=PROFILE_DIR):
+    samples = {}
+    for path in glob.glob(os.path.join(profile_dir, '*.jsonl')):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                key = (record['page'], record['interaction'])
+                samples.setdefault(key + ('total',), []).append(record['total_ms'])
+                for name, duration in record['spans'].items():
+                    samples.setdefault(key + (name,), []).append(duration)
+
+    return [
+        {'page': page, 'interaction': interaction, 'span': name, 'count': len(values),
+         'p50_ms': round(_percentile(values, 0.5), 2), 'p95_ms': round(_percentile(values, 0.95), 2)}
+        for (page, interaction, name), values in sorted(samples.items())
+    ]
+
+
+if __name__ == '__main__':
+    for row in summarize(sys.argv[1] if len(sys.argv) > 1 else PROFILE_DIR):
+        print(f"{row['page']:<22} {row['interaction']:<22} {row['span']:<22} n={row['count']:<6}"
+              f" p50={row['p50_ms']:>9.1f} ms  p95={row['p95_ms']:>9.1f} ms")
@@ -0,0 +1,243 @@
+import json
+import math
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import cached_load, file_version
+
+# Mine polygons with COUNTRY_NAME, ISO3_CODE and AREA (sq km) properties, as
+# published with the global mining area dataset. Optional: without it the
+# mining areas page falls back to the per-country CSV.
+POLYGONS_PATH = 'data/global_mining_polygons.geojson'
+
+# Levels of detail as (highest map zoom served, Douglas-Peucker tolerance in
+# degrees, tile size in degrees). The last level keeps the full geometry.
+LEVELS = [
+    (4, 0.02, 30.0),
+    (7, 0.004, 8.0),
+    (10, 0.0005, 2.0),
+    (None, 0.0, 0.5),
+]
+# Upper bound for the polygons sent to the map in one view
+MAX_VIEW_FEATURES = 20_000
+# Viewport results kept per store
+MAX_CACHED_VIEWS = 64
+
+_stores = {}
+_lock = threading.Lock()
+
+
+# Douglas-Peucker simplification of a line of (lon, lat) points
+def simplify_line(points, tolerance):
+    points = np.asarray(points, dtype=float)
+    if tolerance <= 0 or len(points) < 3:
+        return points
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, inner = points[first], points[first + 1:last]
+        dx, dy = points[last] - start
+        length = math.hypot(dx, dy)
+        if length == 0:
+            distances = np.hypot(inner[:, 0] - start[0], inner[:, 1] - start[1])
+        else:
+            distances = np.abs(dx * (inner[:, 1] - start[1]) - dy * (inner[:, 0] - start[0])) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.extend([(first, split), (split, last)])
+    return points[keep]
+
+
+# Simplified polygon rings, or None when the outer ring collapses at this tolerance.
+# Rings no larger than the tolerance collapse without running the simplification.
+def simplify_polygon(rings, tolerance):
+    simplified = []
+    for ring in rings:
+        if tolerance > 0 and np.ptp(ring, axis=0).max() <= tolerance:
+            ring = ring[:0]
+        else:
+            ring = simplify_line(ring, tolerance)
+        if len(ring) < 4:
+            if not simplified:
+                return None
+            continue  # Holes smaller than the tolerance are dropped
+        simplified.append(ring)
+    return simplified
+
+
+def _bbox_ring(bbox, decimals):
+    south, west, north, east = (round(value, decimals) for value in bbox)
+    return [[[west, south], [east, south], [east, north], [west, north], [west, south]]]
+
+
+def _decimals(tolerance):
+    return 6 if tolerance <= 0 else max(0, math.ceil(-math.log10(tolerance))) + 1
+
+
+def _polygons(geometry):
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    return []
+
+
+def _tile_keys(level, south, west, north, east):
+    size = LEVELS[level][2]
+    n_cols = math.ceil(360 / size)
+    rows = range(int((south + 90) // size), int((north + 90) // size) + 1)
+    cols = range(int((west + 180) // size), int((east + 180) // size) + 1)
+    return [row * n_cols + col % n_cols for row in rows for col in cols]
+
+
+# Parse the polygon file into one row per (level, tile, feature) with the
+# feature's simplified geometry as GeoJSON text. Features whose outline
+# collapses at a coarse level are kept as their bounding box so they stay visible.
+def parse_polygons(data_path):
+    with open(data_path, encoding='utf-8') as source:
+        collection = json.load(source)
+
+    rows = []
+    for feature_id, feature in enumerate(collection.get('features', [])):
+        geometry = feature.get('geometry') or {}
+        polygons = [[np.asarray(ring, dtype=float)[:, :2] for ring in polygon] for polygon in _polygons(geometry) if polygon]
+        if not polygons:
+            continue
+        outer = np.concatenate([polygon[0] for polygon in polygons])
+        bbox = (outer[:, 1].min(), outer[:, 0].min(), outer[:, 1].max(), outer[:, 0].max())
+        properties = feature.get('properties') or {}
+
+        # From the finest level to the coarsest, each simplifying the previous
+        # level's outline, which is much cheaper than starting from the full one
+        for level in reversed(range(len(LEVELS))):
+            tolerance = LEVELS[level][1]
+            decimals = _decimals(tolerance)
+            polygons = [part for part in (simplify_polygon(polygon, tolerance) for polygon in polygons) if part]
+            if polygons:
+                parts = [[np.round(ring, decimals).tolist() for ring in polygon] for polygon in polygons]
+            else:
+                parts = [_bbox_ring(bbox, decimals)]
+            text = json.dumps({'type': 'MultiPolygon', 'coordinates': parts}, separators=(',', ':'))
+            for tile in _tile_keys(level, *bbox):
+                rows.append((level, tile, feature_id, properties.get('COUNTRY_NAME'), properties.get('ISO3_CODE'),
+                             properties.get('AREA'), text))
+
+    df = pd.DataFrame(rows, columns=['level', 'tile', 'feature', 'COUNTRY_NAME', 'ISO3_CODE', 'AREA', 'geometry'])
+    df = df.astype({'level': 'int8', 'tile': 'int32', 'feature': 'int32', 'AREA': 'float64',
+                    'COUNTRY_NAME': 'category', 'ISO3_CODE': 'category'})
+    return df
+
+
+# Tiled, multi-resolution store of the mine polygons. Each level is sorted by
+# tile so a viewport is answered with a few binary searches, and only the
+# features of the tiles it overlaps, at the detail its zoom needs, are returned.
+class PolygonStore:
+    def __init__(self, df, version=None):
+        self.version = version
+        self._levels = {level: rows.sort_values('tile', kind='stable').reset_index(drop=True)
+                        for level, rows in df.groupby('level', observed=True)}
+        self._views = {}
+        self._views_lock = threading.Lock()
+
+        # One row per feature, from the full resolution level
+        features = self._levels.get(len(LEVELS) - 1, df.iloc[:0]).drop_duplicates('feature')
+        self.features = features[['feature', 'COUNTRY_NAME', 'ISO3_CODE', 'AREA']].reset_index(drop=True)
+
+    def __len__(self):
+        return len(self.features)
+
+    # Level of detail for a map zoom
+    @staticmethod
+    def level_for_zoom(zoom):
+        for level, (max_zoom, _, _) in enumerate(LEVELS):
+            if max_zoom is None or zoom is None or zoom <= max_zoom:
+                return level
+        return len(LEVELS) - 1
+
+    # Per-country totals in the layout of global_mining_area_per_country_v2.csv
+    def country_totals(self):
+        totals = self.features.groupby(['COUNTRY_NAME', 'ISO3_CODE'], observed=True).agg(
+            AREA=('AREA', 'sum'), N_FEATURES=('feature', 'size'))
+        return totals.reset_index().astype({'COUNTRY_NAME': str, 'ISO3_CODE': str})
+
+    # Rows of one level whose tiles overlap the box; west > east crosses the antimeridian
+    def _rows(self, level, south, west, north, east):
+        rows = self._levels.get(level)
+        if rows is None:
+            return None
+        if west > east:
+            east += 360
+        keys = np.unique(_tile_keys(level, max(south, -90.0), west, min(north, 89.999), min(east, west + 359.999)))
+        tiles = rows['tile'].to_numpy()
+        starts = np.searchsorted(tiles, keys, side='left')
+        ends = np.searchsorted(tiles, keys, side='right')
+        positions = np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)] or [np.empty(0, dtype=int)])
+        return rows.iloc[positions].drop_duplicates('feature')
+
+    # GeoJSON FeatureCollection (as text) of the polygons in the viewport at the
+    # detail for zoom, limited to the given ISO3 codes. Cached per request.
+    def viewport_geojson(self, zoom, south, west, north, east, countries=None, max_features=MAX_VIEW_FEATURES):
+        level = self.level_for_zoom(zoom)
+        key = (level, south, west, north, east, None if countries is None else tuple(sorted(countries)))
+        with self._views_lock:
+            cached = self._views.get(key)
+        if cached is not None:
+            return cached
+
+        rows = self._rows(level, south, west, north, east)
+        if rows is None:
+            rows = self.features.iloc[:0].assign(geometry='')
+        if countries is not None:
+            rows = rows[rows['ISO3_CODE'].isin(countries)]
+        truncated = len(rows) > max_features
+        rows = rows.nlargest(max_features, 'AREA') if truncated else rows
+
+        features = ','.join(
+            '{"type":"Feature","id":%d,"properties":%s,"geometry":%s}'
+            % (feature, json.dumps({'COUNTRY_NAME': country, 'AREA': round(area, 4)}), geometry)
+            for feature, country, area, geometry in zip(rows['feature'], rows['COUNTRY_NAME'].astype(str),
+                                                        rows['AREA'].fillna(0), rows['geometry']))
+        result = ('{"type":"FeatureCollection","features":[%s]}' % features, len(rows), truncated)
+        with self._views_lock:
+            if len(self._views) >= MAX_CACHED_VIEWS:
+                self._views.pop(next(iter(self._views)))
+            self._views[key] = result
+        return result
+
+
+# Return the polygon store for data_path, or None without a polygon file.
+# Tiles are built once per file version and kept as Parquet in .cache/datasets.
+def polygon_store(data_path=POLYGONS_PATH):
+    if data_path is None or not os.path.exists(data_path):
+        return None
+    version = file_version(data_path)
+    store = _stores.get(data_path)
+    if store is not None and store.version == version:
+        return store
+
+    with _lock:
+        store = _stores.get(data_path)
+        if store is None or store.version != version:
+            store = PolygonStore(cached_load(data_path, parse_polygons), version)
+            _stores[data_path] = store
+        return store
+
+
+# Prebuild the tile cache, e.g. after replacing the polygon file:
+#   python -m utils.mining_polygons [path/to/polygons.geojson]
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else POLYGONS_PATH
+    store = polygon_store(path)
+    if store is None:
+        sys.exit(f"No polygon file at {path}")
+    print(f"{len(store):,} features, {len(store.country_totals())} countries, {len(LEVELS)} levels of detail")
@@ -0,0 +1,196 @@
+import glob
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from utils.data_loader import FLOWS, MINERALS, STATISTICS_DATASETS, cache_artifacts, file_version
+from utils.ingest import DATASETS_DIR, IngestError, dataset_file_name
+from utils.mining_polygons import POLYGONS_PATH
+
+MANIFEST_PATH = os.path.join(DATASETS_DIR, 'manifest.json')
+# Seconds between checks of the files on disk when resolving datasets
+REFRESH_INTERVAL = 1.0
+
+# Datasets shipped with the app as name -> (path, kind). Uploads from the admin
+# panel with the same name as a statistics dataset replace it.
+BUILTIN_DATASETS = {
+    **{f"{mineral} {flow}": (STATISTICS_DATASETS[(mineral, flow)], 'statistics') for mineral in MINERALS for flow in FLOWS},
+    'Global Mineral Mining Stations': ('data/Global Mineral Mining Stations.csv', 'deposits'),
+    'Global Mining Areas': ('data/global_mining_area_per_country_v2.csv', 'mining_areas'),
+    'Global Mining Polygons': (POLYGONS_PATH, 'polygons'),
+    'Vietnam Statistical Yearbook': ('data/Vietnam Statistical Yearbook Data.csv', 'yearbook'),
+}
+
+# Kinds an upload may replace; the admin panel only accepts the statistics layout
+UPLOAD_KINDS = {'statistics'}
+
+
+# Uploads are stored under a file name derived from the dataset name, so
+# "Titanium Export" and "Titanium_Export.parquet" refer to the same dataset
+def dataset_key(name):
+    return os.path.splitext(dataset_file_name(name))[0]
+
+
+# File an upload is stored in. Raises IngestError for names of built-in datasets
+# whose kind uploads cannot replace, since such a file would never be registered.
+def upload_path(name):
+    key = dataset_key(name)
+    for builtin_name, (_, kind) in BUILTIN_DATASETS.items():
+        if kind not in UPLOAD_KINDS and dataset_key(builtin_name) == key:
+            raise IngestError(f"'{builtin_name}' is a built-in dataset and cannot be replaced by an upload.")
+    return os.path.join(DATASETS_DIR, dataset_file_name(name))
+
+
+def _read_schema(path):
+    if path.endswith('.parquet'):
+        return {field.name: str(field.type) for field in pq.read_schema(path)}
+    if path.endswith('.csv'):
+        header = pd.read_csv(path, nrows=100, encoding='utf-8-sig')
+        header.columns = header.columns.str.strip()
+        return {column: str(dtype) for column, dtype in header.dtypes.items()}
+    return {}
+
+
+# Manifest of every dataset the pages read: its file, schema, content hash, a
+# version number that increases whenever the content changes, and the cached
+# artifacts derived from it. Datasets are resolved by name, so a new upload
+# takes effect on the next run of every session without a restart.
+class DatasetRegistry:
+    def __init__(self, manifest_path=MANIFEST_PATH):
+        self.manifest_path = manifest_path
+        self._entries = self._read_manifest()
+        self._lock = threading.Lock()
+        self._checked_at = None
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path, encoding='utf-8') as manifest:
+                return {entry['name']: entry for entry in json.load(manifest)['datasets']}
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _write_manifest(self):
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path) or '.', exist_ok=True)
+            tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as manifest:
+                json.dump({'datasets': sorted(self._entries.values(), key=lambda entry: entry['name'])}, manifest, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError:
+            pass  # Read-only deployments keep the manifest in memory only
+
+    # Sources as name -> (path, kind, origin); uploads replace built-in datasets of the same name
+    def _sources(self):
+        sources = {name: (path, kind, 'builtin') for name, (path, kind) in BUILTIN_DATASETS.items() if os.path.exists(path)}
+        builtin_names = {dataset_key(name): name for name in BUILTIN_DATASETS}
+        for path in sorted(glob.glob(os.path.join(DATASETS_DIR, '*.parquet'))):
+            key = os.path.splitext(os.path.basename(path))[0]
+            name = builtin_names.get(key, key.replace('_', ' '))
+            kind = BUILTIN_DATASETS[name][1] if name in BUILTIN_DATASETS else 'statistics'
+            if name not in BUILTIN_DATASETS or kind in UPLOAD_KINDS:
+                sources[name] = (path, kind, 'upload')
+        return sources
+
+    # Bring the manifest up to date with the files on disk. Files are only hashed
+    # again when their mtime or size changed (see file_version). Unless forced,
+    # the files are checked at most once per REFRESH_INTERVAL.
+    def refresh(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._checked_at is not None and now - self._checked_at < REFRESH_INTERVAL:
+                return list(self._entries.values())
+            self._checked_at = now
+            changed = False
+            sources = self._sources()
+            for name, (path, kind, origin) in sources.items():
+                content_hash = file_version(path)
+                entry = self._entries.get(name)
+                if entry is not None and entry['path'] == path and entry['content_hash'] == content_hash:
+                    artifacts = cache_artifacts(path)
+                    if entry.get('artifacts') != artifacts:
+                        entry['artifacts'] = artifacts
+                        changed = True
+                    continue
+                self._entries[name] = {
+                    'name': name,
+                    'kind': kind,
+                    'origin': origin,
+                    'path': path,
+                    'description': (entry or {}).get('description', ''),
+                    'schema': _read_schema(path),
+                    'content_hash': content_hash,
+                    'version': (entry or {}).get('version', 0) + 1,
+                    'updated_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(os.path.getmtime(path))),
+                    'artifacts': cache_artifacts(path),
+                }
+                changed = True
+
+            for name in set(self._entries) - set(sources):
+                del self._entries[name]
+                changed = True
+            if changed:
+                self._write_manifest()
+            return list(self._entries.values())
+
+    def entries(self):
+        return sorted(self.refresh(force=True), key=lambda entry: entry['name'])
+
+    # Manifest entry of a dataset, raises KeyError for unknown or missing datasets
+    def resolve(self, name):
+        self.refresh()
+        return self._entries[name]
+
+    def set_description(self, name, description):
+        self.refresh(force=True)
+        with self._lock:
+            self._entries[name]['description'] = description
+            self._write_manifest()
+
+    # Delete an uploaded dataset and its cached artifacts; the built-in dataset
+    # of the same name, if any, takes its place again
+    def remove_upload(self, name):
+        self.refresh(force=True)
+        entry = self._entries[name]
+        if entry['origin'] != 'upload':
+            raise ValueError(f"'{name}' is a built-in dataset and cannot be removed.")
+        for path in [entry['path']] + cache_artifacts(entry['path']):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.refresh(force=True)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = DatasetRegistry()
+    return _registry
+
+
+# Path of the current file of a dataset
+def dataset_path(name):
+    return registry().resolve(name)['path']
+
+
+# Optional datasets resolve to None when their file is not present
+def optional_dataset_path(name):
+    try:
+        return dataset_path(name)
+    except KeyError:
+        return None
+
+
+# Statistics datasets as (mineral, flow) -> path, with uploads applied
+def statistics_datasets():
+    return {(mineral, flow): dataset_path(f"{mineral} {flow}") for mineral in MINERALS for flow in FLOWS}
@@ -0,0 +1,158 @@
+import threading
+
+import numpy as np
+
+from utils.data_loader import file_version, load_deposits
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+# Largest possible great-circle distance, any radius beyond this covers the globe
+MAX_DISTANCE_KM = np.pi * EARTH_RADIUS_KM
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+# Great-circle distance in km from one point to arrays of points
+def haversine_km(lat, lon, lats, lons):
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+# Grid bucket index over latitude/longitude points.
+# Points are sorted by grid cell so every query only looks at the cells that
+# overlap the requested area. Queries return row positions into the arrays the
+# index was built from (use them with DataFrame.iloc).
+class SpatialIndex:
+    def __init__(self, latitudes, longitudes, cell_size=1.0):
+        lat = np.asarray(latitudes, dtype=float)
+        lon = np.asarray(longitudes, dtype=float)
+        self.cell_size = cell_size
+        self.n_rows = int(np.ceil(180 / cell_size))
+        self.n_cols = int(np.ceil(360 / cell_size))
+
+        positions = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+        cells = self._row(lat[positions]) * self.n_cols + self._col(lon[positions])
+        order = np.argsort(cells, kind='stable')
+        self._cells = cells[order]
+        self._positions = positions[order]
+        self._lat = lat[self._positions]
+        self._lon = lon[self._positions]
+
+    def __len__(self):
+        return len(self._positions)
+
+    def _row(self, lat):
+        rows = np.floor((np.asarray(lat) + 90) / self.cell_size).astype(int)
+        return np.clip(rows, 0, self.n_rows - 1)
+
+    def _col(self, lon):
+        cols = np.floor(((np.asarray(lon) + 180) % 360) / self.cell_size).astype(int)
+        return np.clip(cols, 0, self.n_cols - 1)
+
+    # Longitude ranges (as column ranges) covered by west..east, split at the antimeridian
+    def _column_ranges(self, west, east):
+        if east - west >= 360:
+            return [(0, self.n_cols - 1)]
+        first, last = int(self._col(west)), int(self._col(east))
+        if first <= last:
+            return [(first, last)]
+        return [(first, self.n_cols - 1), (0, last)]
+
+    # Offsets into the sorted arrays of every point in the cells overlapping the box
+    def _candidates(self, south, west, north, east):
+        rows = np.arange(self._row(south), self._row(north) + 1)
+        chunks = []
+        for first, last in self._column_ranges(west, east):
+            starts = np.searchsorted(self._cells, rows * self.n_cols + first, side='left')
+            ends = np.searchsorted(self._cells, rows * self.n_cols + last, side='right')
+            chunks.extend(np.arange(start, end) for start, end in zip(starts, ends) if end > start)
+        if not chunks:
+            return np.empty(0, dtype=int)
+        return np.concatenate(chunks)
+
+    # Positions of all points inside a bounding box, e.g. the current map viewport.
+    # west may be greater than east when the box crosses the antimeridian.
+    def within_bbox(self, south, west, north, east):
+        south, north = max(south, -90.0), min(north, 90.0)
+        if south > north:
+            return np.empty(0, dtype=int)
+        offsets = self._candidates(south, west, north, east)
+        lat, lon = self._lat[offsets], self._lon[offsets]
+        inside = (lat >= south) & (lat <= north)
+        if east - west < 360:
+            west = (west + 180) % 360 - 180
+            east = (east + 180) % 360 - 180
+            if west <= east:
+                inside &= (lon >= west) & (lon <= east)
+            else:
+                inside &= (lon >= west) | (lon <= east)
+        return np.sort(self._positions[offsets[inside]])
+
+    # Positions and distances (km) of all points within radius_km of a point, nearest first
+    def within_radius(self, lat, lon, radius_km):
+        dlat = radius_km / KM_PER_DEGREE
+        south, north = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+        if south <= -90 or north >= 90:
+            west, east = -180.0, 180.0
+        else:
+            dlon = dlat / np.cos(np.radians(max(abs(south), abs(north))))
+            west, east = (lon - dlon, lon + dlon) if dlon < 180 else (-180.0, 180.0)
+
+        offsets = self._candidates(south, west, north, east)
+        distances = haversine_km(lat, lon, self._lat[offsets], self._lon[offsets])
+        inside = distances <= radius_km
+        offsets, distances = offsets[inside], distances[inside]
+        order = np.argsort(distances, kind='stable')
+        return self._positions[offsets[order]], distances[order]
+
+    # Positions and distances (km) of the k points nearest to a point.
+    # The search radius grows until it holds k points, so only nearby cells are scanned.
+    def nearest(self, lat, lon, k=5, start_radius_km=50.0):
+        radius = start_radius_km
+        while True:
+            positions, distances = self.within_radius(lat, lon, radius)
+            if len(positions) >= k or radius >= MAX_DISTANCE_KM:
+                return positions[:k], distances[:k]
+            radius = min(radius * 4, MAX_DISTANCE_KM)
+
+
+# Spatial index over the deposits file, built once per file version
+def deposit_index(data_path):
+    version = file_version(data_path)
+    cached = _indexes.get(data_path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with _lock:
+        cached = _indexes.get(data_path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        data = load_deposits(data_path)
+        index = SpatialIndex(data['LATITUDE'], data['LONGITUDE'])
+        _indexes[data_path] = (version, index)
+        return index
+
+
+# Bounding box for a Leaflet/st_folium bounds dict, widened by margin (a fraction
+# of the view size) and snapped outwards to step degrees so small pans map to the
+# same box. Returns None when the bounds are not known yet.
+def padded_viewport(bounds, margin=0.5, step=1.0):
+    try:
+        south, west = bounds['_southWest']['lat'], bounds['_southWest']['lng']
+        north, east = bounds['_northEast']['lat'], bounds['_northEast']['lng']
+    except (KeyError, TypeError):
+        return None
+    if None in (south, west, north, east):
+        return None
+
+    pad_lat, pad_lon = (north - south) * margin, (east - west) * margin
+    south = max(np.floor((south - pad_lat) / step) * step, -90.0)
+    north = min(np.ceil((north + pad_lat) / step) * step, 90.0)
+    west = np.floor((west - pad_lon) / step) * step
+    east = np.ceil((east + pad_lon) / step) * step
+    if east - west >= 360:
+        west, east = -180.0, 180.0
+    return float(south), float(west), float(north), float(east)
@@ -0,0 +1,190 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.commodity_store import get_store
+from utils.data_loader import FLOWS, MINERALS
+
+# Fewest countries reporting a flow of a sub-commodity in a year for its
+# concentration to be summarised
+MIN_REPORTERS = 3
+SUMMARY_COLUMNS = ['Mineral', 'Flow', 'Sub-commodity', 'Year', 'HHI', 'Top Supplier', 'Top Share', 'Suppliers']
+
+_cubes = {}
+_summaries = {}
+_lock = threading.Lock()
+
+
+# Sorted sub-commodities reported in every one of flows
+def _shared_commodities(panel, flows):
+    sub_commodities = panel.index.get_level_values('sub_commodity')
+    shared = None
+    for flow in flows:
+        reported = set(sub_commodities[panel[flow].notna().to_numpy()])
+        shared = reported if shared is None else shared & reported
+    return sorted(str(name) for name in shared)
+
+
+# Export, import and production of one mineral aligned on shared indexes, with
+# the derived trade metrics computed once per dataset version. Sub-commodities
+# are in different units (metal, oxides, concentrates, ores), so every metric is
+# computed within one sub-commodity and never summed across them:
+#   panel            (country, sub_commodity, year) x flow, tonnes
+#   trade            (country, sub_commodity, year) x Export, Import, net_trade
+#                    (export - import) for the sub-commodities of trade_commodities
+#   consumption      (country, sub_commodity, year) x flow plus apparent_consumption
+#                    (production + import - export) for consumption_commodities
+#   growth           (country, sub_commodity, year) x flow, year-over-year change (0.1 = +10%)
+#   shares           (country, sub_commodity, year) x flow, share of the world total
+#   concentration    (sub_commodity, year) x flow, Herfindahl-Hirschman index (0-10,000)
+# Net trade and apparent consumption need sub-commodities reported by every flow
+# involved; production often uses its own breakdown (e.g. ilmenite, rutile), so
+# consumption_commodities can be empty. Missing flows count as zero as long as
+# the country reported one of them that year.
+class TradeCube:
+    def __init__(self, rows, version=None):
+        self.version = version
+        panel = rows.pivot_table(index=['country', 'sub_commodity', 'year'], columns='flow', values='tonnes',
+                                 aggfunc='sum', observed=True)
+        self.panel = panel.reindex(columns=FLOWS).astype('float64')
+        self.panel.columns = list(FLOWS)
+        sub_commodities = self.panel.index.get_level_values('sub_commodity')
+
+        self.trade_commodities = _shared_commodities(self.panel, ['Export', 'Import'])
+        trade = self.panel.loc[sub_commodities.isin(self.trade_commodities), ['Export', 'Import']].dropna(how='all')
+        self.trade = trade.assign(net_trade=trade['Export'].fillna(0) - trade['Import'].fillna(0))
+
+        self.consumption_commodities = _shared_commodities(self.panel, FLOWS)
+        consumption = self.panel.loc[sub_commodities.isin(self.consumption_commodities)].dropna(how='all')
+        reported = consumption.fillna(0)
+        self.consumption = consumption.assign(
+            apparent_consumption=reported['Production'] + reported['Import'] - reported['Export'],
+        )
+
+        # Year-over-year change: each row is aligned with the same country and
+        # sub-commodity in the previous year (NaN when that year is missing)
+        previous_index = pd.MultiIndex.from_arrays([self.panel.index.get_level_values('country'), sub_commodities,
+                                                    self.panel.index.get_level_values('year') - 1])
+        previous = self.panel.reindex(previous_index)
+        previous.index = self.panel.index
+        self.growth = (self.panel - previous) / previous.where(previous > 0)
+
+        world = self.panel.groupby(level=['sub_commodity', 'year'], observed=True).transform('sum')
+        self.shares = self.panel / world.where(world > 0)
+        self.concentration = (self.shares ** 2).groupby(level=['sub_commodity', 'year'], observed=True).sum(min_count=1) * 10_000
+
+        self._wide = {}
+
+    # Sorted sub-commodities with data for flow
+    def commodities(self, flow):
+        return _shared_commodities(self.panel, [flow])
+
+    # Rows of one sub-commodity of a table indexed like panel, as (country, year)
+    @staticmethod
+    def select(table, sub_commodity):
+        return table.xs(sub_commodity, level='sub_commodity')
+
+    # Years with data for flow of a sub-commodity, oldest first
+    def years(self, flow, sub_commodity):
+        values = self.select(self.panel[flow], sub_commodity).dropna()
+        return sorted(values.index.get_level_values('year').unique().tolist())
+
+    # Country x year table of flow for one sub-commodity
+    def wide(self, flow, sub_commodity):
+        table = self._wide.get((flow, sub_commodity))
+        if table is None:
+            table = self.select(self.panel[flow], sub_commodity).unstack('year')
+            self._wide[(flow, sub_commodity)] = table
+        return table
+
+    # Compound annual growth rate per country between two years, for countries
+    # with a positive value in both years
+    def cagr(self, flow, sub_commodity, first, last):
+        if last <= first:
+            return pd.Series(dtype='float64')
+        table = self.wide(flow, sub_commodity)
+        if first not in table.columns or last not in table.columns:
+            return pd.Series(dtype='float64')
+        start, end = table[first], table[last]
+        valid = (start > 0) & (end > 0)
+        return ((end[valid] / start[valid]) ** (1 / (last - first)) - 1).sort_values(ascending=False)
+
+    # Number of countries reporting a positive flow per (sub_commodity, year)
+    def reporters(self, flow):
+        return self.panel[flow].gt(0).groupby(level=['sub_commodity', 'year'], observed=True).sum()
+
+    # Largest suppliers of flow of a sub-commodity in a year with their world market share
+    def leaders(self, flow, sub_commodity, year, n=5):
+        shares = self.select(self.shares[flow], sub_commodity).xs(year, level='year').dropna()
+        return shares.sort_values(ascending=False).head(n)
+
+
+def _versions(store, mineral):
+    return tuple(store.versions[(mineral, flow)] for flow in FLOWS)
+
+
+# Trade cube for one mineral, rebuilt only when one of its three datasets changed
+def get_trade_cube(mineral):
+    store = get_store()
+    version = _versions(store, mineral)
+    cube = _cubes.get(mineral)
+    if cube is not None and cube.version == version:
+        return cube
+
+    with _lock:
+        cube = _cubes.get(mineral)
+        if cube is None or cube.version != version:
+            cube = TradeCube(store.query(mineral=mineral), version)
+            _cubes[mineral] = cube
+        return cube
+
+
+# Supply concentration of the production and exports of each sub-commodity of
+# a mineral: the latest well-reported year, its Herfindahl index, the largest
+# supplier and its world share. Years where fewer than MIN_REPORTERS countries,
+# or fewer than half of the usual number, reported the sub-commodity are
+# skipped, since a lone reporter would look like a monopoly; sub-commodities
+# without such a year are left out.
+def supply_risk_records(mineral, cube):
+    records = []
+    for flow in ('Production', 'Export'):
+        concentration = cube.concentration[flow].dropna()
+        reporters = cube.reporters(flow)
+        for sub_commodity in cube.commodities(flow):
+            counts = cube.select(reporters, sub_commodity)
+            well_reported = counts[counts >= max(MIN_REPORTERS, counts.max() / 2)]
+            hhi = cube.select(concentration, sub_commodity)
+            well_reported = well_reported[well_reported.index.isin(hhi.index)]
+            if well_reported.empty:
+                continue
+            year = int(well_reported.index.max())
+            leaders = cube.leaders(flow, sub_commodity, year, n=1)
+            records.append({
+                'Mineral': mineral,
+                'Flow': flow,
+                'Sub-commodity': sub_commodity,
+                'Year': year,
+                'HHI': round(float(hhi[year]), 1),
+                'Top Supplier': str(leaders.index[0]) if len(leaders) else None,
+                'Top Share': float(leaders.iloc[0]) if len(leaders) else np.nan,
+                'Suppliers': int(counts[year]),
+            })
+    return records
+
+
+# supply_risk_records of every mineral side by side, cached per version of the
+# nine datasets
+def supply_risk_summary():
+    store = get_store()
+    version = tuple(_versions(store, mineral) for mineral in MINERALS)
+    summary = _summaries.get(version)
+    if summary is not None:
+        return summary
+
+    records = [record for mineral in MINERALS for record in supply_risk_records(mineral, get_trade_cube(mineral))]
+    summary = pd.DataFrame(records, columns=SUMMARY_COLUMNS)
+    with _lock:
+        _summaries.clear()
+        _summaries[version] = summary
+    return summary
@@ -0,0 +1,71 @@
+import io
+import threading
+from collections import OrderedDict
+
+from utils.data_loader import file_version, load_yearbook
+
+# Number of (year range, minerals) selections kept in memory
+MAX_SELECTIONS = 128
+
+_selections = OrderedDict()
+_lock = threading.Lock()
+
+
+# Render a correlation matrix as an annotated heatmap and return it as PNG bytes.
+# seaborn and matplotlib are imported here so runs that never show the heatmap
+# do not pay for loading them.
+def render_heatmap(correlation):
+    import seaborn as sns
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    ax = fig.subplots()
+    sns.heatmap(correlation, annot=True, cmap='coolwarm', ax=ax)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight', dpi=200)
+    return buffer.getvalue()
+
+
+# Derived tables for one year range and mineral selection of the yearbook.
+# They are computed once per selection and shared between sessions, so they
+# must not be modified in place.
+class YearbookSelection:
+    def __init__(self, df, years, minerals):
+        minerals = list(minerals)
+        rows = df[(df['Year'] >= years[0]) & (df['Year'] <= years[1])]
+        self.filtered = rows[['Year'] + minerals].reset_index(drop=True)
+        self.medians = self.filtered[minerals].median()
+        self.melted = self.filtered.melt(id_vars='Year', var_name='Mineral', value_name='Production')
+        self.correlation = self.filtered[minerals].corr()
+        self._heatmap = None
+        self._heatmap_lock = threading.Lock()
+
+    # Minerals whose median production is above threshold
+    def significant(self, threshold):
+        return self.medians[self.medians > threshold].index.tolist()
+
+    # Heatmap of the correlation matrix, rasterized on first use only
+    def heatmap_png(self):
+        with self._heatmap_lock:
+            if self._heatmap is None:
+                self._heatmap = render_heatmap(self.correlation)
+            return self._heatmap
+
+
+# Return the derived tables for a selection, computing them only when the
+# selection was not seen since the data file last changed
+def yearbook_selection(data_path, years, minerals):
+    key = (data_path, file_version(data_path), (int(years[0]), int(years[1])), tuple(minerals))
+    with _lock:
+        selection = _selections.get(key)
+        if selection is not None:
+            _selections.move_to_end(key)
+            return selection
+
+    selection = YearbookSelection(load_yearbook(data_path), key[2], minerals)
+    with _lock:
+        selection = _selections.setdefault(key, selection)
+        _selections.move_to_end(key)
+        while len(_selections) > MAX_SELECTIONS:
+            _selections.popitem(last=False)
+    return selection